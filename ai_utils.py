@@ -2,54 +2,243 @@ import hashlib
 import json
 import os
 import re
-from typing import Dict, List
-
-from openai import OpenAI
-
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from compaction import estimate_tokens
+from llm_gateway import LLMGateway
+from llm_memo import llm_memo, memo_key
+from metrics import Counter, register, span
+from rules import (
+    EMAIL_RE,
+    PHONE_RE,
+    extract_rule_fields,
+    split_confident,
+    text_for_fields,
+)
 from models import ResumeKeyInfo, MatchScore
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+LLM_MODEL = "gpt-4o-mini"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+LLM_MAX_OUTPUT_TOKENS = 400  # 回复为短 JSON，用于 TPM 预估
+
+# 提示词版本，参与 LLM 回复缓存的 key；改了对应提示词就加一，旧结果不再命中
+KEY_INFO_PROMPT_VERSION = "key_info-1"
+MATCH_PROMPT_VERSION = "match-1"
+PROMPT_VERSIONS = (KEY_INFO_PROMPT_VERSION, MATCH_PROMPT_VERSION)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# openai SDK 导入要几百毫秒，客户端在第一次调用（或启动预热）时才创建；
+# 所有 LLM 调用都走异步客户端 + gateway，限速、重试和熔断只有这一条路径
+_async_client: Optional["AsyncOpenAI"] = None
+_client_lock = threading.Lock()
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """异步客户端：复用同一个连接池，避免 LLM 调用阻塞事件循环。"""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            # 重试由 gateway 统一负责，SDK 自带的重试关掉，避免叠加
+            _async_client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONCURRENCY * 2,
+                        max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                    )
+                ),
+            )
+        return _async_client
+
+
+LLM_REPLY_FALLBACKS = register(
+    Counter(
+        "resume_matcher_llm_reply_fallbacks_total",
+        "LLM 回复不是合法 JSON，改用正则提取（extracted）或直接放弃（empty）的次数",
+        ("outcome",),
+    )
+)
+KEY_INFO_FIELDS = register(
+    Counter(
+        "resume_matcher_key_info_fields_total",
+        "关键信息字段来源：rule 规则直接采用，llm 由 LLM 补全，missing 两者都没有",
+        ("field", "source"),
+    )
+)
+
+# 每个 worker 的限速、自适应并发（上限 LLM_MAX_CONCURRENCY）、重试和熔断
+gateway = LLMGateway(max_concurrency=LLM_MAX_CONCURRENCY)
 
 
 def compute_resume_id(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
 
 
+def compute_upload_digest(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def compute_job_digest(job_text: str) -> str:
+    # 不能用内置 hash()：它按进程加盐，多 worker / 重启后不一致
+    return hashlib.sha256(job_text.encode("utf-8")).hexdigest()[:16]
+
+
 # ---------- 关键信息提取 ----------
 
-def _call_gpt_for_key_info(text: str) -> Dict:
+def _key_info_messages(
+    text: str, fields: Optional[List[str]] = None
+) -> List[Dict[str, str]]:
+    """fields 为空时抽取全部字段，否则只请求规则引擎没有把握的字段。"""
+    if fields:
+        field_desc = (
+            f"只需要这些字段：{', '.join(fields)}。"
+            "无法确定的字段填 null。"
+        )
+    else:
+        field_desc = (
+            "字段包括：name, phone, email, address, job_intention, "
+            "years_of_experience, education_background, extra。"
+        )
     system_prompt = (
         "你是一个简历解析助手，请从中文或英文简历文本中抽取关键信息。"
-        "只用 JSON 格式回答，不要有多余文字。"
-        "字段包括：name, phone, email, address, job_intention, "
-        "years_of_experience, education_background, extra。"
+        "只用 JSON 格式回答，不要有多余文字。" + field_desc
     )
     user_prompt = f"以下是简历全文，请解析：\n\n{text}\n\n请用 JSON 返回。"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.2,
-    )
-    content = resp.choices[0].message.content.strip()
 
+def _parse_json_reply(content: str) -> Dict:
+    """解析回复里的 JSON 对象；正则兜底也解析不了或不是对象时返回空字典。"""
+    content = content.strip()
     try:
         data = json.loads(content)
     except json.JSONDecodeError:
         m = re.search(r"\{.*\}", content, re.S)
-        data = json.loads(m.group(0)) if m else {}
+        try:
+            data = json.loads(m.group(0)) if m else None
+        except json.JSONDecodeError:
+            data = None
+        LLM_REPLY_FALLBACKS.inc("extracted" if isinstance(data, dict) else "empty")
+    return data if isinstance(data, dict) else {}
+
+
+def _remember(key: str, version: str, resp: Any, content: str) -> None:
+    usage = getattr(resp, "usage", None)
+    llm_memo.set(
+        key,
+        version,
+        LLM_MODEL,
+        content,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+async def _chat_async(
+    key: str, messages: List[Dict[str, str]], temperature: float
+) -> Tuple[str, Any]:
+    """返回 (回复, 原始响应)，命中缓存时原始响应为 None。
+
+    熔断打开或重试耗尽时抛出 LLMUnavailableError。
+    """
+    with span("llm_memo"):
+        content = llm_memo.get(key)
+    if content is not None:
+        return content, None
+    est_tokens = LLM_MAX_OUTPUT_TOKENS + sum(
+        estimate_tokens(m["content"]) for m in messages
+    )
+    async_client = get_async_client()
+    resp = await gateway.call(
+        lambda: async_client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=messages,
+            temperature=temperature,
+        ),
+        est_tokens=est_tokens,
+    )
+    return resp.choices[0].message.content or "", resp
+
+
+# 回复先解析，解析出 JSON 对象才写入回复缓存；坏回复不缓存，下次重新请求上游
+
+async def _ask_json_async(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    prompt_version: str,
+    span_name: str,
+) -> Dict:
+    key = memo_key(prompt_version, LLM_MODEL, temperature, messages)
+    with span(span_name):
+        content, resp = await _chat_async(key, messages, temperature)
+    with span("llm_parse"):
+        data = _parse_json_reply(content)
+    if resp is not None and data:
+        _remember(key, prompt_version, resp, content)
+    return data
+
+
+async def _call_gpt_for_key_info_async(
+    text: str, fields: Optional[List[str]] = None
+) -> Dict:
+    return await _ask_json_async(
+        _key_info_messages(text, fields), 0.2, KEY_INFO_PROMPT_VERSION, "llm_key_info"
+    )
+
+
+def _rule_key_info(text: str) -> Tuple[Dict, Dict, List[str]]:
+    """规则引擎先抽取，返回 (全部规则结果, 可直接采用的字段, 需要 LLM 补全的字段)。"""
+    with span("rule_extract"):
+        found = extract_rule_fields(text)
+        confident, missing = split_confident(found)
+    return found, confident, missing
+
+
+def _merge_key_info(
+    found: Dict, confident: Dict, missing: List[str], llm_data: Dict
+) -> Dict:
+    data = dict(confident)
+    for field in missing:
+        value = llm_data.get(field)
+        if value not in (None, ""):
+            data[field] = value
+            KEY_INFO_FIELDS.inc(field, "llm")
+        elif field in found:
+            # LLM 也没给出时，低置信度的规则结果总比空着好
+            data[field] = found[field][0]
+            KEY_INFO_FIELDS.inc(field, "rule")
+        else:
+            KEY_INFO_FIELDS.inc(field, "missing")
+    for field in confident:
+        KEY_INFO_FIELDS.inc(field, "rule")
+    if llm_data.get("extra"):
+        data["extra"] = llm_data["extra"]
     return data
 
 
-def extract_key_info(text: str) -> ResumeKeyInfo:
-    data = _call_gpt_for_key_info(text)
+async def extract_key_info_async(text: str) -> ResumeKeyInfo:
+    """规则引擎有把握的字段直接采用，只把剩下的字段交给 LLM；全部有把握时不调用 LLM。"""
+    found, confident, missing = _rule_key_info(text)
+    llm_data = {}
+    if missing:
+        llm_data = await _call_gpt_for_key_info_async(
+            text_for_fields(text, missing), missing + ["extra"]
+        )
+    return _build_key_info(text, _merge_key_info(found, confident, missing, llm_data))
 
-    EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-    PHONE_RE = re.compile(r"(1[3-9]\d{9})|(\+?\d[\d -]{8,}\d)")
 
+def _build_key_info(text: str, data: Dict) -> ResumeKeyInfo:
     email = data.get("email")
     if not email:
         m = EMAIL_RE.search(text)
@@ -103,7 +292,7 @@ def extract_keywords(text: str, top_k: int = 10) -> List[str]:
     return [w for w, _ in sorted_tokens[:top_k]]
 
 
-def _call_gpt_for_match_score(resume_text: str, job_text: str) -> Dict:
+def _match_score_messages(resume_text: str, job_text: str) -> List[Dict[str, str]]:
     system_prompt = (
         "你是一个招聘匹配评估助手。现在有一份候选人简历和一个岗位描述，"
         "请给出技能匹配、工作经验匹配、学历匹配和综合评分（0-1）。"
@@ -120,27 +309,32 @@ def _call_gpt_for_match_score(resume_text: str, job_text: str) -> Dict:
 
 请根据以上内容进行评分。
 """
-
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.1,
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+async def _call_gpt_for_match_score_async(resume_text: str, job_text: str) -> Dict:
+    return await _ask_json_async(
+        _match_score_messages(resume_text, job_text),
+        0.1,
+        MATCH_PROMPT_VERSION,
+        "llm_match",
     )
-    content = resp.choices[0].message.content.strip()
-    try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        m = re.search(r"\{.*\}", content, re.S)
-        data = json.loads(m.group(0)) if m else {}
-    return data
 
 
-def compute_match_score(resume_text: str, job_text: str) -> MatchScore:
-    data = _call_gpt_for_match_score(resume_text, job_text)
+async def compute_match_score_async(
+    resume_text: str, job_text: str, keywords: Optional[List[str]] = None
+) -> MatchScore:
+    """keywords 为 JD 预处理得到的关键词，LLM 未返回 keywords 时直接使用。"""
+    data = await _call_gpt_for_match_score_async(resume_text, job_text)
+    return _build_match_score(data, job_text, keywords)
+
 
+def _build_match_score(
+    data: Dict, job_text: str, keywords: Optional[List[str]] = None
+) -> MatchScore:
     def _num(v, default=0.0):
         if isinstance(v, (int, float)):
             return float(v)
@@ -157,7 +351,7 @@ def compute_match_score(resume_text: str, job_text: str) -> MatchScore:
     skill = _clip01(_num(data.get("skill_match_score"), 0.0))
     exp = _clip01(_num(data.get("experience_match_score"), 0.0))
     edu = _clip01(_num(data.get("education_match_score"), 0.0))
-    keywords = data.get("keywords") or extract_keywords(job_text, top_k=10)
+    keywords = data.get("keywords") or keywords or extract_keywords(job_text, top_k=10)
 
     return MatchScore(
         overall_score=round(overall, 4),
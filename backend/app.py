@@ -1,24 +1,143 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import time
+
+_import_started = time.perf_counter()  # 统计 app 导入耗时，启动时报告
+
+import asyncio
+import json
+import os
+import shutil
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Set, Tuple, Union
 
 from models import (
     ResumeParsed,
-    ResumeKeyInfo,
-    ResumeFullInfo,
     JobRequest,
+    MatchScore,
     MatchResponse,
+    CompactMatchResponse,
+    BatchJobRequest,
+    RankRequest,
+    RankedResume,
+    RankResponse,
+    FilterRequest,
+    ResumeSummary,
+    FilterResponse,
+    JobRegisterRequest,
+    JobProfile,
+    ResumeStatus,
+    IngestJobStatus,
+    MATCH_RESPONSE_FIELDS,
+    MATCH_VIEWS,
+)
+from parser import shutdown_pool, warm_pool
+from ai_utils import (
+    PROMPT_VERSIONS,
+    compute_match_score_async,
+    gateway,
+    get_async_client,
 )
-from parser import parse_pdf_resume
-from ai_utils import extract_key_info, compute_resume_id, compute_match_score
-from cache import cache_resume, get_cached_resume, cache_match, get_cached_match
+from llm_gateway import LLM_BREAKER_COOLDOWN, LLMUnavailableError
+from llm_memo import llm_memo
+from cache import (
+    get_cached_resume,
+    cache_match,
+    get_cached_match,
+    index_upload,
+    cache_stats,
+    add_sweep_hook,
+    start_sweeper,
+    stop_sweeper,
+    set_resume_status,
+    get_resume_status,
+    clear_resume_status,
+)
+from search import resume_index, sync_from_store
+from scoring import local_match_score, parse_degree_level
+from facets import facet_index
+from jobs import register_job, get_job_profile
+from jobsim import NEAR_DUPLICATE_MATCHES, find_near_duplicates, job_index
+from compaction import build_resume_digest, compaction_stats
+from metrics import Family, MetricsMiddleware, register_collector, render, span
+import fastjson
+import ingest
+from fastjson import FastJSONResponse
+from pipeline import (
+    MULTIPART_OVERHEAD,
+    UPLOAD_MAX_MB,
+    BodySizeLimitMiddleware,
+    IngestError,
+    flights,
+    extract_and_cache,
+    spool_upload,
+    discard_upload,
+    get_cached_upload,
+    parse_spooled_upload,
+    ingest_resume_file,
+)
+from warmup import STARTUP_WARMUP, WarmupStep, record_import, run_warmup, startup_stats
+
+record_import(time.perf_counter() - _import_started)
+
+
+def _warm_llm_client() -> None:
+    get_async_client()
+
+
+def _warm_indexes() -> Dict[str, int]:
+    sync_from_store(resume_index, facet_index)
+    job_index.sync(max_age=0)
+    return {"resumes": len(resume_index.ids()), "jobs": len(job_index)}
+
+
+def _purge_llm_memo() -> int:
+    """清掉旧提示词版本、已过期和超出容量的 LLM 回复缓存。"""
+    return llm_memo.purge_versions(PROMPT_VERSIONS)
+
+
+WARMUP_STEPS: List[WarmupStep] = [
+    ("llm_client", _warm_llm_client),
+    ("pdf_pool", warm_pool),
+    ("indexes", _warm_indexes),
+    ("llm_memo", _purge_llm_memo),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    add_sweep_hook(_purge_llm_memo)
+    start_sweeper()
+    if STARTUP_WARMUP == "blocking":
+        await run_warmup(WARMUP_STEPS)
+    else:
+        # 不阻塞启动：预热完成前到达的请求走按需初始化
+        task = asyncio.ensure_future(run_warmup(WARMUP_STEPS))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    yield
+    stop_sweeper()
+    shutdown_pool()
+
 
 app = FastAPI(
     title="AI Resume Matcher",
     description="简历上传解析 + 关键信息提取 + JD 匹配评分",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# 在 multipart 解析、落盘之前按请求体大小拒绝；后注册的中间件在外层，
+# CORS 要包住它，413 才带跨域头，前端能读到 detail；指标中间件在最外层，拒绝也会被统计
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/upload-resume": UPLOAD_MAX_MB * 1024 * 1024 + MULTIPART_OVERHEAD,
+        "/ingest": ingest.INGEST_MAX_TOTAL_MB * 1024 * 1024,
+    },
+)
 # CORS：允许前端页面访问（GitHub Pages）
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +145,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
+
+_background_tasks: Set["asyncio.Task[None]"] = set()
+
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+RANK_MAX_TOP_K = int(os.getenv("RANK_MAX_TOP_K", "50"))
+# auto 模式下等待 LLM 的上限（秒）
+LLM_MATCH_TIMEOUT = float(os.getenv("LLM_MATCH_TIMEOUT", "15"))
+# 匹配请求等待后台关键信息提取的上限（秒）及轮询间隔
+RESUME_WAIT_TIMEOUT = float(os.getenv("RESUME_WAIT_TIMEOUT", "60"))
+RESUME_POLL_INTERVAL = 0.5
 
 
 @app.get("/")
@@ -34,63 +166,574 @@ async def root():
     return {"status": "ok", "message": "Resume matcher backend running"}
 
 
+@app.get("/cache-stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    return cache_stats()
+
+
+@app.get("/prompt-stats")
+async def get_prompt_stats() -> Dict[str, Any]:
+    return compaction_stats()
+
+
+@app.get("/startup-stats")
+async def get_startup_stats() -> Dict[str, Any]:
+    return startup_stats()
+
+
+def _collect_metrics() -> Iterator[Family]:
+    """/metrics 抓取时读取缓存、LLM 网关、摘要压缩的现有统计。"""
+    stats = cache_stats()
+    for field, name, kind, help in [
+        ("hits", "cache_hits_total", "counter", "缓存命中次数"),
+        ("misses", "cache_misses_total", "counter", "缓存未命中次数"),
+        ("evictions", "cache_evictions_total", "counter", "容量淘汰条目数"),
+        ("expirations", "cache_expirations_total", "counter", "过期清理条目数"),
+        ("entries", "cache_entries", "gauge", "当前条目数"),
+        ("bytes", "cache_bytes", "gauge", "当前估算占用字节数"),
+    ]:
+        samples = [
+            ({"namespace": ns}, ns_stats[field])
+            for ns, ns_stats in sorted(stats.items())
+            if field in ns_stats
+        ]
+        yield f"resume_matcher_{name}", kind, help, samples
+
+    llm = gateway.stats()
+    outcomes = ("succeeded", "failed", "retries", "throttled")
+    yield from [
+        ("resume_matcher_llm_in_flight", "gauge", "在途 LLM 请求数",
+         [({}, llm["in_flight"])]),
+        ("resume_matcher_llm_concurrency_limit", "gauge", "自适应并发上限",
+         [({}, llm["concurrency_limit"])]),
+        ("resume_matcher_llm_breaker_open", "gauge", "熔断器未闭合（含半开）",
+         [({}, int(llm["breaker"] != "closed"))]),
+        ("resume_matcher_llm_requests_total", "counter", "LLM 调用结果",
+         [({"outcome": k}, llm[k]) for k in outcomes]
+         + [({"outcome": "rejected"}, llm["breaker_rejected"])]),
+        ("resume_matcher_llm_tokens_total", "counter", "OpenAI 返回的 token 用量",
+         [({"kind": "prompt"}, llm["prompt_tokens"]),
+          ({"kind": "completion"}, llm["completion_tokens"])]),
+    ]
+
+    memo = llm_memo.stats()
+    yield from [
+        ("resume_matcher_llm_memo_lookups_total", "counter", "LLM 回复缓存查询结果",
+         [({"result": "hit"}, memo["hits"]), ({"result": "miss"}, memo["misses"])]),
+        ("resume_matcher_llm_memo_saved_tokens_total", "counter",
+         "LLM 回复缓存命中省下的 token 数",
+         [({"kind": "prompt"}, memo["saved_prompt_tokens"]),
+          ({"kind": "completion"}, memo["saved_completion_tokens"])]),
+        ("resume_matcher_llm_memo_saved_usd_total", "counter",
+         "LLM 回复缓存命中按单价估算省下的美元", [({}, memo["saved_usd"])]),
+    ]
+
+    prompt = compaction_stats()
+    yield from [
+        ("resume_matcher_match_prompt_tokens_total", "counter", "匹配打分的简历侧 token 数",
+         [({"kind": "full"}, prompt["tokens_full"]),
+          ({"kind": "sent"}, prompt["tokens_sent"])]),
+        ("resume_matcher_singleflight_in_flight", "gauge", "进程内合并中的计算数",
+         [({}, flights.in_flight())]),
+        ("resume_matcher_job_index_entries", "gauge", "近似重复 JD 索引中的 JD 数",
+         [({}, len(job_index))]),
+    ]
+
+    startup = startup_stats()
+    if startup["import_seconds"] is not None:
+        yield ("resume_matcher_startup_import_seconds", "gauge", "app 模块导入耗时",
+               [({}, startup["import_seconds"])])
+    if startup["warmup_seconds"] is not None:
+        yield ("resume_matcher_startup_warmup_seconds", "gauge", "启动预热耗时",
+               [({}, startup["warmup_seconds"])])
+
+
+register_collector(_collect_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/llm-stats")
+async def get_llm_stats() -> Dict[str, Any]:
+    return {**gateway.stats(), "memo": llm_memo.stats()}
+
+
+@app.exception_handler(IngestError)
+async def ingest_error_handler(request: Request, exc: IngestError) -> JSONResponse:
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(
+    request: Request, exc: LLMUnavailableError
+) -> JSONResponse:
+    # 熔断期间直接拒绝，不让请求堆积在上游
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(LLM_BREAKER_COOLDOWN))},
+    )
+
+
 @app.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def upload_resume(
+    file: UploadFile = File(...), background: bool = False
+) -> FastJSONResponse:
+    """background=true 时解析完立即返回 ResumeStatus（已缓存的简历直接为 ready），
+    关键信息在后台提取，可通过 /resume/{resume_id} 或 /resume/{resume_id}/events 查询进度。"""
     if file.content_type not in ["application/pdf"]:
         raise HTTPException(status_code=400, detail="只支持 PDF 文件")
 
-    file_bytes = await file.read()
-    raw_text, cleaned_text = parse_pdf_resume(file_bytes)
+    # 过大的请求已被 BodySizeLimitMiddleware 拒绝；分块落盘，解析进程直接读文件
+    with span("spool"):
+        path, file_digest = await spool_upload(file)
+    if not background:
+        result, _ = await ingest_resume_file(path, file_digest)
+        return FastJSONResponse(result)
+
+    # 缓存命中也返回 ResumeStatus，和后台提取时的响应同一种结构
+    cached = get_cached_upload(file_digest)
+    if cached:
+        discard_upload(path)
+        return FastJSONResponse(_ready_status(cached))
+
+    resume_id, raw_text, cleaned_text = await parse_spooled_upload(path, file_digest)
+    cached = get_cached_resume(resume_id)
+    if cached:
+        index_upload(file_digest, resume_id)
+        return FastJSONResponse(_ready_status(cached))
+
+    return FastJSONResponse(
+        _extract_in_background(resume_id, raw_text, cleaned_text, file_digest)
+    )
+
+
+@app.post("/ingest", response_model=IngestJobStatus)
+async def create_ingest_job(files: List[UploadFile] = File(...)) -> Dict[str, Any]:
+    """批量导入：接受多个 PDF 和/或 ZIP，立即返回任务状态，后台解析并提取关键信息。"""
+    workdir = ingest.new_workdir()
+    sources = []
+    for i, upload in enumerate(files):
+        path = os.path.join(workdir, f"{i:05d}")
+        # 上传内容可能很大，拷贝放到线程里做，避免阻塞事件循环
+        with open(path, "wb") as out:
+            await asyncio.to_thread(shutil.copyfileobj, upload.file, out)
+        sources.append((upload.filename or f"file-{i}", path))
+    job = await ingest.start_job(sources, workdir)
+    return job.to_dict()
+
+
+@app.get("/ingest/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str) -> Dict[str, Any]:
+    status = ingest.get_job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="未找到对应导入任务")
+    return status
+
+
+def _extract_in_background(
+    resume_id: str, raw_text: str, cleaned_text: str, file_digest: str
+) -> Dict[str, Any]:
+    parsed = ResumeParsed(raw_text=raw_text, cleaned_text=cleaned_text)
+    status = ResumeStatus(resume_id=resume_id, status="pending", parsed=parsed).dict()
+    set_resume_status(resume_id, status)
+
+    async def _run() -> None:
+        try:
+            await flights.do(
+                f"resume:{resume_id}",
+                lambda: extract_and_cache(resume_id, raw_text, cleaned_text),
+            )
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            set_resume_status(resume_id, {**status, "status": "failed", "error": error})
+            return
+        clear_resume_status(resume_id)
+        index_upload(file_digest, resume_id)
+
+    task = asyncio.ensure_future(_run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return status
 
-    if not cleaned_text.strip():
-        raise HTTPException(status_code=400, detail="无法从简历中提取文本")
 
-    resume_id = compute_resume_id(cleaned_text)
+def _ready_status(cached: Dict[str, Any]) -> Dict[str, Any]:
+    resume = cached["resume"]
+    return ResumeStatus(
+        resume_id=resume["resume_id"], status="ready", resume=resume
+    ).dict()
 
-    # 缓存中是否已有
+
+def _resume_status(resume_id: str) -> Optional[Dict[str, Any]]:
+    cached = get_cached_resume(resume_id)
+    if cached:
+        return _ready_status(cached)
+    return get_resume_status(resume_id)
+
+
+async def _wait_for_resume(resume_id: str) -> Dict[str, Any]:
+    """取缓存中的简历；若还在后台提取关键信息，最多等待 RESUME_WAIT_TIMEOUT 秒。"""
     cached = get_cached_resume(resume_id)
     if cached:
         return cached
+    if get_resume_status(resume_id) is None:
+        raise HTTPException(status_code=404, detail="未找到对应简历，请先上传")
 
-    parsed = ResumeParsed(raw_text=raw_text, cleaned_text=cleaned_text)
-    key_info: ResumeKeyInfo = extract_key_info(cleaned_text)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + RESUME_WAIT_TIMEOUT
+    while loop.time() < deadline:
+        flight = flights.get(f"resume:{resume_id}")
+        if flight is not None:
+            # 本进程内的任务直接等结果，失败时由下面的状态检查给出原因
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(flight), max(0.0, deadline - loop.time())
+                )
+            except Exception:
+                pass
+        else:
+            # 其他 worker 上的任务只能轮询共享缓存
+            await asyncio.sleep(RESUME_POLL_INTERVAL)
 
-    full_info = ResumeFullInfo(
-        resume_id=resume_id,
-        parsed=parsed,
-        key_info=key_info,
-    )
+        cached = get_cached_resume(resume_id)
+        if cached:
+            return cached
+        status = get_resume_status(resume_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="未找到对应简历，请先上传")
+        if status["status"] == "failed":
+            raise HTTPException(
+                status_code=502, detail=f"简历关键信息提取失败：{status.get('error')}"
+            )
+    raise HTTPException(status_code=503, detail="简历关键信息仍在提取中，请稍后重试")
+
+
+@app.get("/resume/{resume_id}", response_model=ResumeStatus)
+async def get_resume(resume_id: str) -> Dict[str, Any]:
+    status = _resume_status(resume_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="未找到对应简历，请先上传")
+    return status
 
-    result = {"resume": full_info.dict()}
-    cache_resume(resume_id, result)
 
-    return result
+@app.get("/resume/{resume_id}/events")
+async def resume_events(resume_id: str) -> StreamingResponse:
+    """SSE：推送 ResumeStatus，状态变为 ready / failed 后结束；RESUME_WAIT_TIMEOUT 秒后
+    仍在提取时发送 timeout 事件再结束，客户端改为轮询 /resume/{resume_id}。"""
+
+    async def _stream() -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RESUME_WAIT_TIMEOUT
+        last = None
+        while True:
+            status = _resume_status(resume_id)
+            if status is None:
+                yield "event: error\ndata: " + json.dumps(
+                    {"detail": "未找到对应简历，请先上传"}, ensure_ascii=False
+                ) + "\n\n"
+                return
+            data = json.dumps(status, ensure_ascii=False)
+            if status["status"] != last:
+                last = status["status"]
+                yield f"event: status\ndata: {data}\n\n"
+            if last != "pending":
+                return
+            if loop.time() >= deadline:
+                yield f"event: timeout\ndata: {data}\n\n"
+                return
+            await asyncio.sleep(RESUME_POLL_INTERVAL)
+
+    return StreamingResponse(_stream(), media_type="text/event-stream")
+
+
+def _resolve_job(job_description: Optional[str], job_id: Optional[str]) -> JobProfile:
+    """job_id 优先；否则注册（或复用）job_description 的预处理结果。"""
+    if job_id:
+        job = get_job_profile(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="未找到对应 JD，请先通过 /jobs 注册")
+        return job
+    if not job_description or not job_description.strip():
+        raise HTTPException(status_code=400, detail="job_description 与 job_id 不能都为空")
+    return register_job(job_description)
+
+
+def _match_cache_key(resume_id: str, job_id: str, mode: str) -> str:
+    # llm 与 auto 共用 LLM 结果；本地打分单独缓存
+    if mode == "local":
+        return f"{resume_id}:{job_id}:local"
+    return f"{resume_id}:{job_id}"
+
+
+def _usable_match(
+    data: Optional[Dict[str, Any]], allow_approximate: bool
+) -> Optional[Dict[str, Any]]:
+    if data and (allow_approximate or not data.get("approximate")):
+        return data
+    return None
+
+
+def _near_duplicate_match(resume_id: str, job: JobProfile) -> Optional[Dict[str, Any]]:
+    """同一简历对近似重复 JD 已有 LLM 打分时直接复用，并标记 approximate。"""
+    with span("near_duplicate"):
+        for job_id, similarity in find_near_duplicates(job.job_id, job.minhash):
+            data = get_cached_match(_match_cache_key(resume_id, job_id, "llm"))
+            # 只复用精确打分，避免近似结果一层层传下去越偏越远
+            if data and not data.get("approximate"):
+                NEAR_DUPLICATE_MATCHES.inc("hit")
+                return {
+                    **data,
+                    "approximate": True,
+                    "source_job_id": job_id,
+                    "similarity": round(similarity, 3),
+                }
+    NEAR_DUPLICATE_MATCHES.inc("miss")
+    return None
+
+
+async def _score_job(
+    resume_id: str,
+    resume: Dict[str, Any],
+    job: JobProfile,
+    mode: str = "llm",
+    allow_approximate: bool = True,
+) -> Tuple[Dict[str, Any], bool]:
+    """返回 (MatchScore 字典, 是否命中缓存)。resume 为缓存中的 ResumeFullInfo 字典。"""
+    cache_key = _match_cache_key(resume_id, job.job_id, mode)
+    with span("cache_lookup"):
+        cached_match = _usable_match(get_cached_match(cache_key), allow_approximate)
+    if cached_match:
+        return cached_match, True
+    if mode != "local" and allow_approximate:
+        near = _near_duplicate_match(resume_id, job)
+        if near:
+            cache_match(cache_key, near)
+            return near, True
+
+    resume_text = resume["parsed"]["cleaned_text"]
 
+    def _local() -> Dict[str, Any]:
+        with span("local_score"):
+            return local_match_score(resume_text, resume["key_info"], job).dict()
 
-@app.post("/match-job", response_model=MatchResponse)
-async def match_job(req: JobRequest) -> MatchResponse:
+    if mode == "local":
+        data = _local()
+        cache_match(cache_key, data)
+        return data, False
+
+    async def _compute() -> Dict[str, Any]:
+        # LLM 只看与 JD 相关、限定 token 预算的简历摘要
+        with span("compaction"):
+            digest = build_resume_digest(resume_id, resume, job)
+        match_score = await compute_match_score_async(
+            digest, job.text, keywords=job.keywords
+        )
+        data = match_score.dict()
+        cache_match(cache_key, data)
+        return data
+
+    # 相同简历 + 相同 JD 的并发请求共用一次 LLM 调用
+    flight = flights.do(f"match:{cache_key}", _compute)
+    if mode != "auto":
+        return await flight, False
+    try:
+        return await asyncio.wait_for(flight, LLM_MATCH_TIMEOUT), False
+    except Exception:
+        # 本地兜底结果不写缓存，等 LLM 恢复后再补上
+        return _local(), False
+
+
+@app.post("/jobs", response_model=JobProfile)
+async def create_job(req: JobRegisterRequest) -> JobProfile:
+    """注册 JD：按规范化内容指纹只分析一次，之后可用 job_id 代替全文。"""
     if not req.job_description.strip():
         raise HTTPException(status_code=400, detail="job_description 不能为空")
+    return register_job(req.job_description)
 
-    resume_data = get_cached_resume(req.resume_id)
-    if not resume_data:
-        raise HTTPException(status_code=404, detail="未找到对应简历，请先上传")
 
-    resume = ResumeFullInfo(**resume_data["resume"])
+@app.get("/jobs/{job_id}", response_model=JobProfile)
+async def get_job(job_id: str) -> JobProfile:
+    job = get_job_profile(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="未找到对应 JD，请先通过 /jobs 注册")
+    return job
 
-    cache_key = f"{req.resume_id}:{hash(req.job_description)}"
-    cached_match = get_cached_match(cache_key)
-    if cached_match:
-        return MatchResponse(**cached_match)
 
-    match_score = compute_match_score(resume.parsed.cleaned_text, req.job_description)
+@app.post(
+    "/match-job",
+    # 返回值不经 response_model 校验，这里只用来生成文档：view=full 为 MatchResponse，
+    # view=compact 为 CompactMatchResponse，指定 fields 时为所选字段组成的对象
+    response_model=Union[MatchResponse, CompactMatchResponse, Dict[str, Any]],
+)
+async def match_job(req: JobRequest) -> FastJSONResponse:
+    """view / fields 控制返回哪些字段；直接序列化缓存中的字典，不重建 pydantic 模型。"""
+    fields = req.fields or MATCH_VIEWS[req.view]
+    unknown = [f for f in fields if f not in MATCH_RESPONSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段：{', '.join(unknown)}")
+
+    with span("job_resolve"):
+        job = _resolve_job(req.job_description, req.job_id)
+
+    with span("resume_lookup"):
+        resume_data = await _wait_for_resume(req.resume_id)
+
+    match_data, cached = await _score_job(
+        req.resume_id, resume_data["resume"], job, req.mode, req.allow_approximate
+    )
+    available = {
+        "resume_id": req.resume_id,
+        "job_id": job.job_id,
+        "resume": resume_data["resume"],
+        "job_description": req.job_description or job.text,
+        "match_score": match_data,
+        "cached": cached,
+    }
+    with span("serialize"):
+        return FastJSONResponse({f: available[f] for f in fields})
+
+
+@app.post("/match-jobs")
+async def match_jobs(req: BatchJobRequest) -> StreamingResponse:
+    """一份简历对多个 JD 并发评分，按完成顺序以 NDJSON 逐行返回 BatchMatchItem。"""
+    n_jobs = len(req.job_descriptions) + len(req.job_ids)
+    if not n_jobs:
+        raise HTTPException(status_code=400, detail="job_descriptions 与 job_ids 不能都为空")
+    if n_jobs > BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=400, detail=f"一次最多评估 {BATCH_MAX_JOBS} 个 JD"
+        )
+
+    resume_data = await _wait_for_resume(req.resume_id)
+    resume = resume_data["resume"]
 
-    resp = MatchResponse(
-        resume=resume,
-        job_description=req.job_description,
-        match_score=match_score,
+    concurrency = max(1, min(req.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def _line(
+        index: int,
+        job_id: str,
+        cached: bool = False,
+        match_score: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bytes:
+        # 字段与 BatchMatchItem 一致；match_score 直接用缓存里的字典
+        item = {
+            "index": index,
+            "job_id": job_id,
+            "cached": cached,
+            "match_score": match_score,
+            "error": error,
+        }
+        return fastjson.dumps(item) + b"\n"
+
+    async def _one(index: int, job: JobProfile) -> bytes:
+        try:
+            async with semaphore:
+                data, cached = await _score_job(
+                    req.resume_id, resume, job, req.mode, req.allow_approximate
+                )
+        except Exception as e:
+            return _line(index, job.job_id, error=str(e) or type(e).__name__)
+        return _line(index, job.job_id, cached=cached, match_score=data)
+
+    async def _stream() -> AsyncIterator[bytes]:
+        pending = []
+        inputs = [(jd, None) for jd in req.job_descriptions]
+        inputs += [(None, job_id) for job_id in req.job_ids]
+        # 缓存命中和非法输入直接返回，不占并发名额
+        for index, (jd, job_id) in enumerate(inputs):
+            try:
+                job = _resolve_job(jd, job_id)
+            except HTTPException as e:
+                yield _line(index, job_id or "", error=e.detail)
+                continue
+            cached_match = _usable_match(
+                get_cached_match(_match_cache_key(req.resume_id, job.job_id, req.mode)),
+                req.allow_approximate,
+            )
+            if cached_match:
+                yield _line(index, job.job_id, cached=True, match_score=cached_match)
+            else:
+                pending.append(asyncio.ensure_future(_one(index, job)))
+        try:
+            for fut in asyncio.as_completed(pending):
+                yield await fut
+        finally:
+            for task in pending:
+                task.cancel()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/rank-resumes", response_model=RankResponse)
+async def rank_resumes(req: RankRequest) -> RankResponse:
+    """本地 BM25 粗排全部已缓存简历，只把前 top_k 份交给 LLM 精排。"""
+    job = _resolve_job(req.job_description, req.job_id)
+    top_k = max(1, min(req.top_k, RANK_MAX_TOP_K))
+
+    sync_from_store(resume_index)
+    candidates = resume_index.search(job.term_counts, top_k)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _rerank(resume_id: str, prefilter_score: float) -> RankedResume:
+        item = RankedResume(
+            resume_id=resume_id, prefilter_score=round(prefilter_score, 4)
+        )
+        resume_data = get_cached_resume(resume_id)
+        if not resume_data:
+            item.error = "简历已过期"
+            return item
+        item.name = resume_data["resume"]["key_info"].get("name")
+        if not req.rerank:
+            return item
+        try:
+            async with semaphore:
+                data, _ = await _score_job(resume_id, resume_data["resume"], job, req.mode)
+            item.match_score = MatchScore(**data)
+        except Exception as e:
+            item.error = str(e) or type(e).__name__
+        return item
+
+    results = await asyncio.gather(
+        *[_rerank(rid, score) for rid, score in candidates]
     )
+    if req.rerank:
+        results.sort(
+            key=lambda r: (
+                r.match_score.overall_score if r.match_score else -1.0,
+                r.prefilter_score,
+            ),
+            reverse=True,
+        )
 
-    cache_match(cache_key, resp.dict())
-    return resp
+    return RankResponse(
+        job_id=job.job_id,
+        total_candidates=len(resume_index),
+        results=results,
+    )
 
+
+@app.post("/filter-resumes", response_model=FilterResponse)
+async def filter_resumes(req: FilterRequest) -> FilterResponse:
+    """按年限区间、最低学历、求职意向、地址过滤已缓存简历（走二级索引，不反序列化简历）。"""
+    min_degree = None
+    if req.degree:
+        min_degree = parse_degree_level(req.degree)
+        if min_degree is None:
+            raise HTTPException(status_code=400, detail=f"无法识别的学历：{req.degree}")
+
+    sync_from_store(facet_index)
+    total, docs = facet_index.query(
+        min_years=req.min_years,
+        max_years=req.max_years,
+        min_degree=min_degree,
+        job_intention=req.job_intention,
+        address=req.address,
+        limit=max(1, min(req.limit, 1000)),
+    )
+    return FilterResponse(total=total, results=[ResumeSummary(**d) for d in docs])
@@ -0,0 +1,4 @@
+"""性能基准：本地假 LLM 服务、PDF 语料生成、压测与微基准。
+
+在 backend 目录下运行：python -m bench.run --out report.json
+"""
@@ -0,0 +1,135 @@
+"""生成可复现的简历 PDF 语料（纯 ASCII，内置 Helvetica 字体，不依赖第三方库）。"""
+import argparse
+import os
+import random
+from typing import Dict, List
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry"]
+LAST_NAMES = ["Chen", "Wang", "Li", "Zhang", "Liu", "Smith", "Brown", "Lee"]
+SKILLS = [
+    "Python", "Java", "Go", "Rust", "TypeScript", "React", "Django", "FastAPI",
+    "Spring", "Kubernetes", "Docker", "Redis", "MySQL", "PostgreSQL", "Kafka",
+    "Spark", "TensorFlow", "PyTorch", "AWS", "Linux", "gRPC", "GraphQL",
+]
+DEGREES = ["Bachelor of Science", "Master of Engineering", "PhD", "Associate Degree"]
+VERBS = ["Designed", "Built", "Maintained", "Optimized", "Migrated", "Led"]
+OBJECTS = [
+    "a payment service", "the search backend", "data pipelines", "an internal API",
+    "the recommendation engine", "CI/CD workflows", "a monitoring stack",
+]
+
+# 每份文档的页数档位
+SIZES: Dict[str, int] = {"small": 1, "medium": 3, "large": 10, "xlarge": 30}
+LINES_PER_PAGE = 45
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """把每页若干行文本排成最简单的 PDF。"""
+    objs = [
+        (1, "<< /Type /Catalog /Pages 2 0 R >>"),
+        None,  # 2: Pages，页对象编号确定后再填
+        (3, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ]
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(
+            f"({_escape(line)}) Tj T*" for line in lines
+        ) + " ET"
+        objs.append((
+            page_id,
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>",
+        ))
+        objs.append((
+            content_id,
+            f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        ))
+        kids.append(f"{page_id} 0 R")
+    objs[1] = (2, f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in objs:
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def resume_pages(rng: random.Random, index: int, n_pages: int) -> List[List[str]]:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}"
+    skills = rng.sample(SKILLS, 6)
+    years = rng.randint(1, 15)
+    header = [
+        name,
+        f"Email: candidate{index}@example.com",
+        f"Phone: 138{index:08d}"[:18],
+        f"Job intention: {skills[0]} engineer",
+        f"{years} years of experience",
+        f"Education: {rng.choice(DEGREES)}",
+        "Skills: " + ", ".join(skills),
+        "Work Experience",
+    ]
+    pages = []
+    for p in range(n_pages):
+        lines = header if p == 0 else []
+        while len(lines) < LINES_PER_PAGE:
+            lines.append(
+                f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with "
+                f"{rng.choice(skills)} and {rng.choice(skills)}"
+            )
+        pages.append(lines)
+    return pages
+
+
+def generate(out_dir: str, count: int, seed: int = 42) -> List[Dict[str, object]]:
+    """按 small/medium/large/xlarge 轮流生成 count 份简历，返回文件清单。"""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    sizes = list(SIZES)
+    manifest = []
+    for i in range(count):
+        size = sizes[i % len(sizes)]
+        data = make_pdf(resume_pages(rng, i, SIZES[size]))
+        path = os.path.join(out_dir, f"resume_{i:05d}_{size}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        manifest.append({"path": path, "size": size, "bytes": len(data)})
+    return manifest
+
+
+JOB_DESCRIPTIONS = [
+    "Senior Python backend engineer, 5+ years, Django or FastAPI, Redis, MySQL, "
+    "Bachelor degree or above",
+    "Go developer for cloud infrastructure, Kubernetes, Docker, gRPC, 3 years",
+    "Data engineer: Spark, Kafka, Python, AWS, Master degree preferred",
+    "Frontend engineer with React and TypeScript, GraphQL experience, 2 years",
+    "Machine learning engineer, PyTorch or TensorFlow, PhD or Master",
+]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="生成基准测试用的简历 PDF")
+    ap.add_argument("out_dir")
+    ap.add_argument("--count", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    manifest = generate(args.out_dir, args.count, args.seed)
+    total = sum(int(m["bytes"]) for m in manifest)
+    print(f"wrote {len(manifest)} PDFs ({total / 1024 / 1024:.1f} MB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
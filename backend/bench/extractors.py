@@ -0,0 +1,179 @@
+"""PDF 抽取后端对比：顺序抽取吞吐、长文档分页段并行的延迟、逐页缓存命中后的耗时。
+
+    cd backend && python -m bench.extractors --docs 40 --out extractor-report.json
+    python -m bench.extractors --corpus-dir ~/resumes --backends pypdf2,pymupdf
+
+未安装的后端记为 unavailable 并跳过；chars_vs_pypdf2 是抽出的字符数与 pypdf2 之比，
+用来粗看各后端抽得全不全。
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bench.corpus import generate
+from bench.run import BACKEND_DIR, _git_commit, _percentile
+
+
+def _timed(fn: Any) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _latency_ms(samples: List[float]) -> Dict[str, float]:
+    values = sorted(s * 1000 for s in samples)
+    return {
+        "p50_ms": round(_percentile(values, 0.5), 2),
+        "p95_ms": round(_percentile(values, 0.95), 2),
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+    }
+
+
+def bench_backend(
+    name: str, paths: List[str], long_paths: List[str], workers: int
+) -> Dict[str, Any]:
+    import parser
+
+    try:
+        parser.get_extractor(name).load()
+    except ImportError as e:
+        return {"available": False, "error": str(e)}
+
+    # 顺序抽取：关掉逐页缓存，测的是后端本身
+    parser.PDF_PAGE_CACHE = False
+    pages = sum(
+        min(_page_count(parser, name, path), parser.PDF_MAX_PAGES) for path in paths
+    )
+    chars = 0
+    latencies = []
+    started = time.perf_counter()
+    for path in paths:
+        t0 = time.perf_counter()
+        raw, _ = parser.parse_pdf_resume(path, parser.PDF_MAX_PAGES, None, name)
+        latencies.append(time.perf_counter() - t0)
+        chars += len(raw)
+    elapsed = time.perf_counter() - started
+    result: Dict[str, Any] = {
+        "available": True,
+        "sequential": {
+            "docs_per_sec": round(len(paths) / elapsed, 2),
+            "pages_per_sec": round(pages / elapsed, 1),
+            **_latency_ms(latencies),
+        },
+        "chars": chars,
+    }
+
+    # 长文档：同一进程池里比较整篇交给一个 worker 与按页段拆给多个 worker
+    async def _run(parallel_min_pages: int) -> List[float]:
+        samples = []
+        for path in long_paths:
+            t0 = time.perf_counter()
+            await parser.parse_pdf_resume_async(
+                path, extractor=name, parallel_min_pages=parallel_min_pages
+            )
+            samples.append(time.perf_counter() - t0)
+        return samples
+
+    async def _long_docs() -> Dict[str, Any]:
+        await asyncio.get_running_loop().run_in_executor(
+            None, parser.warm_pool, name
+        )
+        whole = await _run(parser.PDF_MAX_PAGES + 1)
+        split = await _run(parser.PDF_PARALLEL_MIN_PAGES)
+        return {"whole_doc": _latency_ms(whole), "page_ranges": _latency_ms(split)}
+
+    if long_paths and workers > 1:
+        result["long_docs"] = asyncio.run(_long_docs())
+
+    # 逐页缓存：第一遍写入，第二遍全部命中
+    parser.PDF_PAGE_CACHE = True
+    sample = paths[: min(len(paths), 20)]
+    for path in sample:
+        parser.parse_pdf_resume(path, parser.PDF_MAX_PAGES, None, name)
+    cached = [
+        _timed(lambda p=path: parser.parse_pdf_resume(p, None, None, name))
+        for path in sample
+    ]
+    result["page_cache_hit"] = _latency_ms(cached)
+    return result
+
+
+def _page_count(parser: Any, name: str, path: str) -> int:
+    ext = parser.get_extractor(name)
+    with ext.open(path) as doc:
+        return ext.page_count(doc)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="PDF 抽取后端对比")
+    ap.add_argument("--docs", type=int, default=40, help="生成的语料份数")
+    ap.add_argument("--corpus-dir", help="改用该目录下的 PDF（如真实简历样本）")
+    ap.add_argument("--backends", default="pypdf2,pypdf,pymupdf")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default="extractor-report.json")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="resume-extract-bench-")
+    # 逐页缓存只在共享后端上启用，用临时目录里的 SQLite，不污染本地缓存库；
+    # 进程池 worker 数按参数设置
+    os.environ["CACHE_BACKEND"] = "sqlite"
+    os.environ["CACHE_PATH"] = os.path.join(workdir, "cache.sqlite3")
+    os.environ["PDF_WORKERS"] = str(args.workers)
+    sys.path.insert(0, BACKEND_DIR)
+    import parser
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "config": vars(args),
+        },
+        "backends": {},
+    }
+    try:
+        if args.corpus_dir:
+            pattern = os.path.join(args.corpus_dir, "**", "*.pdf")
+            paths = sorted(glob.glob(pattern, recursive=True))
+            long_paths = [
+                p for p in paths
+                if _page_count(parser, "pypdf2", p) >= parser.PDF_PARALLEL_MIN_PAGES
+            ]
+        else:
+            manifest = generate(os.path.join(workdir, "corpus"), args.docs, args.seed)
+            paths = [str(m["path"]) for m in manifest]
+            long_paths = [str(m["path"]) for m in manifest if m["size"] == "xlarge"]
+
+        for name in args.backends.split(","):
+            name = name.strip()
+            print(f"[extractors] {name} ...", file=sys.stderr)
+            report["backends"][name] = bench_backend(
+                name, paths, long_paths, args.workers
+            )
+        parser.shutdown_pool()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    base = report["backends"].get("pypdf2", {}).get("chars")
+    for result in report["backends"].values():
+        if base and result.get("available"):
+            result["chars_vs_pypdf2"] = round(result["chars"] / base, 3)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report["backends"], ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""本地 OpenAI 兼容的假 LLM 服务，只实现 /v1/chat/completions。
+
+    python -m bench.fake_llm --port 9100 --latency 0.8 --jitter 0.3 --error-rate 0.01
+
+让 app 指向它：OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=bench
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_YEARS_RE = re.compile(r"(\d+) years")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z+#.]{1,}")
+
+
+def _key_info_reply(prompt: str) -> Dict[str, Any]:
+    lines = [l for l in prompt.splitlines() if l.strip()]
+    email = _EMAIL_RE.search(prompt)
+    years = _YEARS_RE.search(prompt)
+    return {
+        "name": lines[1].strip() if len(lines) > 1 else None,
+        "email": email.group(0) if email else None,
+        "years_of_experience": int(years.group(1)) if years else None,
+        "education_background": "Bachelor" if "Bachelor" in prompt else None,
+        "extra": {},
+    }
+
+
+def _match_reply(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    words = sorted({w.lower() for w in _WORD_RE.findall(prompt)})[:8]
+    overall = round(rng.uniform(0.3, 0.95), 2)
+    return {
+        "overall_score": overall,
+        "skill_match_score": round(min(1.0, overall + 0.05), 2),
+        "experience_match_score": round(rng.uniform(0.3, 1.0), 2),
+        "education_match_score": round(rng.uniform(0.5, 1.0), 2),
+        "keywords": words,
+    }
+
+
+def create_app(
+    latency: float = 0.5,
+    jitter: float = 0.2,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    """latency ± jitter 秒后回复；error_rate 比例返回 500，rate_limit_rate 比例返回 429。"""
+    app = FastAPI(title="fake-llm")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0, "in_flight": 0, "peak": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        messages: List[Dict[str, str]] = body.get("messages", [])
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak"] = max(stats["peak"], stats["in_flight"])
+        try:
+            await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+            roll = rng.random()
+            if roll < rate_limit_rate:
+                stats["rate_limited"] += 1
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"message": "rate limited", "type": "rate_limit"}},
+                    headers={"retry-after": "1"},
+                )
+            if roll < rate_limit_rate + error_rate:
+                stats["errors"] += 1
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": {"message": "upstream error", "type": "server"}},
+                )
+
+            system = messages[0]["content"] if messages else ""
+            prompt = messages[-1]["content"] if messages else ""
+            if "简历解析" in system:
+                reply = _key_info_reply(prompt)
+            else:
+                reply = _match_reply(prompt, rng)
+            content = json.dumps(reply, ensure_ascii=False)
+            prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+            completion_tokens = len(content) // 4
+            return JSONResponse(
+                {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+            )
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, int]:
+        return stats
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description="OpenAI 兼容的假 LLM 服务")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--latency", type=float, default=0.5, help="平均延迟（秒）")
+    ap.add_argument("--jitter", type=float, default=0.2, help="延迟抖动（秒）")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回 429 的比例")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    app = create_app(
+        args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
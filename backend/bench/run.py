@@ -0,0 +1,448 @@
+"""端到端基准：起假 LLM 和 app，压测上传/匹配接口，再跑进程内微基准，输出 JSON 报告。
+
+    cd backend && python -m bench.run --docs 200 --concurrency 32 --out report.json
+    python -m bench.run --baseline old.json --out new.json   # 附带与旧报告的对比
+
+报告里的延迟单位为毫秒，内存单位为 MB。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from bench.corpus import JOB_DESCRIPTIONS, generate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------- 统计 ----------
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(v * 1000 for v in latencies)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(values, 0.50), 2),
+            "p95": round(_percentile(values, 0.95), 2),
+            "p99": round(_percentile(values, 0.99), 2),
+            "mean": round(sum(values) / len(values), 2) if values else 0.0,
+            "max": round(values[-1], 2) if values else 0.0,
+        },
+    }
+
+
+def _rss_mb(pid: int) -> Dict[str, Optional[float]]:
+    """进程（含 PDF 解析子进程）的常驻内存；仅 Linux，读 /proc。"""
+    def _read(p: int) -> Dict[str, float]:
+        out = {}
+        with open(f"/proc/{p}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    out[key] = int(value.split()[0]) / 1024
+        return out
+
+    def _children(p: int) -> List[int]:
+        try:
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                return [int(c) for c in f.read().split()]
+        except OSError:
+            return []
+
+    try:
+        main = _read(pid)
+    except OSError:
+        return {"rss_mb": None, "peak_rss_mb": None, "children_rss_mb": None}
+    children = 0.0
+    for child in _children(pid):
+        try:
+            children += _read(child).get("VmRSS", 0.0)
+        except OSError:
+            pass
+    return {
+        "rss_mb": round(main.get("VmRSS", 0.0), 1),
+        "peak_rss_mb": round(main.get("VmHWM", 0.0), 1),
+        "children_rss_mb": round(children, 1),
+    }
+
+
+# ---------- 进程管理 ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} 进程提前退出，返回码 {proc.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} 启动超时")
+
+
+def _start(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND_DIR, env={**os.environ, **env}
+    )
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# ---------- 压测 ----------
+
+async def _load(
+    fns: List[Callable[[], Awaitable[httpx.Response]]], concurrency: int
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def _one(fn: Callable[[], Awaitable[httpx.Response]]) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                resp = await fn()
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[_one(fn) for fn in fns])
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_load(
+    base_url: str, manifest: List[Dict[str, Any]], concurrency: int, app_pid: int
+) -> Dict[str, Any]:
+    docs = []
+    for item in manifest:
+        with open(item["path"], "rb") as f:
+            docs.append((os.path.basename(item["path"]), f.read()))
+
+    results: Dict[str, Any] = {}
+    resume_ids: List[str] = []
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+
+        def _upload(name: str, data: bytes) -> Callable[[], Awaitable[httpx.Response]]:
+            async def _do() -> httpx.Response:
+                resp = await client.post(
+                    "/upload-resume", files={"file": (name, data, "application/pdf")}
+                )
+                if resp.status_code == 200:
+                    resume_ids.append(resp.json()["resume"]["resume_id"])
+                return resp
+            return _do
+
+        # 冷：解析 + LLM；热：同一文件重复上传，走字节哈希缓存
+        results["upload_cold"] = await _load(
+            [_upload(n, d) for n, d in docs], concurrency
+        )
+        results["upload_warm"] = await _load(
+            [_upload(n, d) for n, d in docs], concurrency
+        )
+
+        unique_ids = sorted(set(resume_ids))
+
+        def _match(resume_id: str, jd: str) -> Callable[[], Awaitable[httpx.Response]]:
+            return lambda: client.post(
+                "/match-job", json={"resume_id": resume_id, "job_description": jd}
+            )
+
+        pairs = [(rid, jd) for rid in unique_ids for jd in JOB_DESCRIPTIONS]
+        results["match_cold"] = await _load([_match(*p) for p in pairs], concurrency)
+        results["match_warm"] = await _load([_match(*p) for p in pairs], concurrency)
+
+        results["memory"] = _rss_mb(app_pid)
+        for path in ("/cache-stats", "/llm-stats", "/prompt-stats"):
+            try:
+                resp = await client.get(path)
+                if resp.status_code == 200:
+                    results[path.strip("/").replace("-", "_")] = resp.json()
+            except httpx.HTTPError:
+                pass
+    return results
+
+
+# ---------- 微基准 ----------
+
+def _bench(fn: Callable[[], Any], min_time: float = 0.5, repeat: int = 5) -> Dict[str, float]:
+    """先估算每轮次数使单轮约 min_time/repeat 秒，取各轮每次耗时的中位数。"""
+    fn()
+    n = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeat or n >= 1 << 20:
+            break
+        n *= 2
+    per_op = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(n):
+            fn()
+        per_op.append((time.perf_counter() - started) / n)
+    per_op.sort()
+    median = per_op[len(per_op) // 2]
+    return {
+        "us_per_op": round(median * 1e6, 2),
+        "ops_per_s": round(1 / median, 1) if median > 0 else 0.0,
+        "iterations": n * repeat,
+    }
+
+
+def _peak_alloc_mb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+def run_micro(manifest: List[Dict[str, Any]], workdir: str) -> Dict[str, Any]:
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    # 导入 cache / llm_memo 时就会按环境变量打开默认存储，不能落到 backend/ 目录里
+    os.environ["CACHE_BACKEND"] = "memory"
+    os.environ["LLM_MEMO_PATH"] = os.path.join(workdir, "llm_memo.sqlite3")
+    sys.path.insert(0, BACKEND_DIR)
+    from ai_utils import extract_keywords
+    from cache import LRUCache, SQLiteBackend
+    import parser
+    from parser import clean_text, extract_text_from_pdf, parse_pdf_resume
+
+    # 逐页缓存命中后测不到解析本身，微基准里关掉（后端对比见 bench.extractors）
+    parser.PDF_PAGE_CACHE = False
+
+    results: Dict[str, Any] = {}
+    by_size: Dict[str, str] = {}
+    for item in manifest:
+        by_size.setdefault(item["size"], item["path"])
+
+    for size, path in by_size.items():
+        with open(path, "rb") as f:
+            data = f.read()
+        raw = extract_text_from_pdf(data)
+        results[f"parse_pdf_resume[{size}]"] = {
+            **_bench(lambda: parse_pdf_resume(data)),
+            "peak_alloc_mb": _peak_alloc_mb(lambda: parse_pdf_resume(data)),
+            "pdf_kb": round(len(data) / 1024, 1),
+        }
+        results[f"clean_text[{size}]"] = _bench(lambda: clean_text(raw))
+        results[f"extract_keywords[{size}]"] = _bench(lambda: extract_keywords(raw))
+
+    value = {"resume": {"parsed": {"cleaned_text": "x" * 4000}, "key_info": {}}}
+    keys = [f"k{i}" for i in range(10000)]
+
+    lru = LRUCache("bench", max_entries=5000, max_bytes=1 << 30)
+    counter = iter(range(1 << 62))
+
+    def _lru_set() -> None:
+        lru.set(keys[next(counter) % len(keys)], value)
+
+    results["lru.set"] = _bench(_lru_set)
+    results["lru.get_hit"] = _bench(lambda: lru.get(keys[-1]))
+    results["lru.get_miss"] = _bench(lambda: lru.get("missing"))
+
+    sqlite = SQLiteBackend(os.path.join(workdir, "bench_cache.sqlite3"))
+    try:
+        def _sqlite_set() -> None:
+            sqlite.set("resume", keys[next(counter) % len(keys)], value, ttl=3600)
+
+        results["sqlite.set"] = _bench(_sqlite_set)
+        sqlite.set("resume", "hot", value, ttl=3600)
+        results["sqlite.get_hit"] = _bench(lambda: sqlite.get("resume", "hot"))
+        results["sqlite.get_miss"] = _bench(lambda: sqlite.get("resume", "missing"))
+    finally:
+        sqlite.close()
+    return results
+
+
+# ---------- 报告 ----------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    """新/旧比值：延迟、耗时 < 1 更好，吞吐 > 1 更好。"""
+    diff: Dict[str, Any] = {}
+    for phase, stats in report.get("load", {}).items():
+        old = baseline.get("load", {}).get(phase)
+        if not old or "latency_ms" not in stats or "latency_ms" not in old:
+            continue
+        diff[phase] = {
+            "rps": _ratio(stats["rps"], old["rps"]),
+            **{
+                q: _ratio(stats["latency_ms"][q], old["latency_ms"][q])
+                for q in ("p50", "p95", "p99")
+            },
+        }
+    for name, stats in report.get("micro", {}).items():
+        old = baseline.get("micro", {}).get(name)
+        if old:
+            diff[name] = {"us_per_op": _ratio(stats["us_per_op"], old["us_per_op"])}
+    return diff
+
+
+def _ratio(new: float, old: float) -> Optional[float]:
+    return round(new / old, 3) if old else None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="resume-matcher 性能基准")
+    ap.add_argument("--docs", type=int, default=100, help="语料中的简历数")
+    ap.add_argument("--concurrency", type=int, default=16, help="压测并发")
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--llm-jitter", type=float, default=0.1)
+    ap.add_argument("--llm-error-rate", type=float, default=0.0)
+    ap.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    # app 侧的 LLM 限速，默认放开，避免测到的是配额而不是服务本身
+    ap.add_argument("--llm-rpm", type=int, default=1_000_000)
+    ap.add_argument("--llm-tpm", type=int, default=1_000_000_000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--skip-load", action="store_true", help="只跑微基准")
+    ap.add_argument("--skip-micro", action="store_true", help="只跑压测")
+    ap.add_argument("--baseline", help="旧报告路径，输出与之的比值")
+    ap.add_argument("--out", default="bench-report.json")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": vars(args),
+        }
+    }
+    try:
+        manifest = generate(os.path.join(workdir, "corpus"), args.docs, args.seed)
+
+        if not args.skip_load:
+            llm_port, app_port = _free_port(), _free_port()
+            llm = _start(
+                [
+                    "-m", "bench.fake_llm",
+                    "--port", str(llm_port),
+                    "--latency", str(args.llm_latency),
+                    "--jitter", str(args.llm_jitter),
+                    "--error-rate", str(args.llm_error_rate),
+                    "--rate-limit-rate", str(args.llm_rate_limit_rate),
+                    "--seed", str(args.seed),
+                ],
+                {},
+            )
+            app = None
+            try:
+                _wait_ready(f"http://127.0.0.1:{llm_port}/stats", llm)
+                app = _start(
+                    [
+                        "-m", "uvicorn", "app:app",
+                        "--port", str(app_port),
+                        "--log-level", "warning",
+                    ],
+                    {
+                        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+                        "OPENAI_API_KEY": "bench",
+                        "CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+                        "LLM_MEMO_PATH": os.path.join(workdir, "llm_memo.sqlite3"),
+                        "LLM_RPM": str(args.llm_rpm),
+                        "LLM_TPM": str(args.llm_tpm),
+                    },
+                )
+                base_url = f"http://127.0.0.1:{app_port}"
+                _wait_ready(base_url + "/", app)
+                report["load"] = asyncio.run(
+                    run_load(base_url, manifest, args.concurrency, app.pid)
+                )
+                report["load"]["fake_llm"] = httpx.get(
+                    f"http://127.0.0.1:{llm_port}/stats"
+                ).json()
+            finally:
+                if app is not None:
+                    _stop(app)
+                _stop(llm)
+
+        if not args.skip_micro:
+            report["micro"] = run_micro(manifest, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["vs_baseline"] = compare(json.load(f), report)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for phase, stats in report.get("load", {}).items():
+        if "latency_ms" in stats:
+            lat = stats["latency_ms"]
+            print(
+                f"{phase:<12} rps={stats['rps']:<8} p50={lat['p50']}ms "
+                f"p95={lat['p95']}ms p99={lat['p99']}ms errors={stats['errors']}"
+            )
+    for name, stats in report.get("micro", {}).items():
+        print(f"{name:<32} {stats['us_per_op']}us/op")
+    print(f"report written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
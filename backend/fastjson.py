@@ -0,0 +1,26 @@
+"""热路径接口的 JSON 序列化：装了 orjson 就用 orjson，否则退回标准库。
+
+两者输出都是紧凑的 UTF-8（中文不转义），调用方无需区分。
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """直接序列化缓存里的字典，跳过 FastAPI 的 jsonable_encoder 和 response_model 校验。"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
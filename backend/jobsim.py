@@ -0,0 +1,188 @@
+"""近似重复 JD：规范化文本的 MinHash 签名 + LSH 分桶。
+
+只改了空白、标点、薪资行或条目顺序的 JD 与原 JD 的签名几乎一致，
+同一份简历对原 JD 已有的打分可以直接复用（响应里标记 approximate）。
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from cache import get_cached_job, list_job_ids
+from metrics import Counter, register
+from search import tokenize
+
+# 估计的 Jaccard 相似度达到该值才复用打分；设为 0 关闭近似匹配
+JD_SIMILARITY_THRESHOLD = float(os.getenv("JD_SIMILARITY_THRESHOLD", "0.9"))
+# 距上次与缓存后端对齐超过该秒数才重新列出其他 worker 注册的 JD
+JOB_INDEX_SYNC_INTERVAL = float(os.getenv("JOB_INDEX_SYNC_INTERVAL", "30"))
+
+MINHASH_PERM = 64
+# 16 段 × 4 行：相似度约 0.5 以上的 JD 大概率落进同一个桶，再用签名精确筛选
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERM // LSH_BANDS
+
+# 薪资、福利行经常单独改动，不参与相似度计算
+_SALARY_RE = re.compile(
+    r"薪资|薪酬|月薪|年薪|待遇|工资|薪水|salary|compensation|"
+    r"\d+(?:\.\d+)?\s*[kKwW万]\s*[-~～至到]\s*\d+(?:\.\d+)?\s*[kKwW万]",
+    re.I,
+)
+
+NEAR_DUPLICATE_MATCHES = register(
+    Counter(
+        "resume_matcher_jd_near_duplicate_total",
+        "精确缓存未命中时查找近似重复 JD 打分的结果：hit 复用，miss 仍需打分",
+        ("result",),
+    )
+)
+
+# multiply-shift 哈希族的参数，固定种子保证多 worker / 重启后签名一致
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(1, 2**63, MINHASH_PERM, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, MINHASH_PERM, dtype=np.uint64)
+
+
+def _shingles(text: str) -> Set[str]:
+    """按行取相邻词对；行之间不连接，所以调整条目顺序不影响结果。"""
+    shingles: Set[str] = set()
+    for line in text.splitlines():
+        if _SALARY_RE.search(line):
+            continue
+        tokens = tokenize(line)
+        if len(tokens) == 1:
+            shingles.add(tokens[0])
+        shingles.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return shingles
+
+
+def minhash_signature(text: str) -> List[int]:
+    shingles = _shingles(text)
+    if not shingles:
+        return []
+    x = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a·x + b) mod 2^64 取高 32 位；uint64 溢出回绕正是需要的取模
+    hashed = (x[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32).tolist()
+
+
+def similarity(a: Iterable[int], b: Iterable[int]) -> float:
+    """两个签名估计的 Jaccard 相似度。"""
+    sa, sb = np.asarray(a, dtype=np.uint32), np.asarray(b, dtype=np.uint32)
+    if sa.size != MINHASH_PERM or sb.size != MINHASH_PERM:
+        return 0.0
+    return float(np.mean(sa == sb))
+
+
+def _bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [
+        (i, signature[i * LSH_ROWS:(i + 1) * LSH_ROWS].tobytes())
+        for i in range(LSH_BANDS)
+    ]
+
+
+class JobIndex:
+    """已注册 JD 的 LSH 索引，按签名查找近似重复的 job_id。"""
+
+    def __init__(self) -> None:
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, job_id: str, signature: List[int]) -> None:
+        if len(signature) != MINHASH_PERM:
+            return
+        sig = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            if job_id in self._signatures:
+                return
+            self._signatures[job_id] = sig
+            for band in _bands(sig):
+                self._buckets.setdefault(band, set()).add(job_id)
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            sig = self._signatures.pop(job_id, None)
+            if sig is None:
+                return
+            for band in _bands(sig):
+                bucket = self._buckets.get(band)
+                if bucket is not None:
+                    bucket.discard(job_id)
+                    if not bucket:
+                        del self._buckets[band]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._signatures)
+
+    def similar(
+        self, job_id: str, signature: List[int], threshold: float
+    ) -> List[Tuple[str, float]]:
+        """返回相似度不低于 threshold 的其他 job_id，按相似度从高到低。"""
+        if len(signature) != MINHASH_PERM:
+            return []
+        sig = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            candidates: Set[str] = set()
+            for band in _bands(sig):
+                candidates |= self._buckets.get(band, set())
+            candidates.discard(job_id)
+            scored = [
+                (cid, similarity(self._signatures[cid], sig))
+                for cid in candidates
+            ]
+        return sorted(
+            ((cid, s) for cid, s in scored if s >= threshold),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+
+    def sync(self, max_age: float = JOB_INDEX_SYNC_INTERVAL) -> None:
+        """与缓存后端对齐：补上其他 worker 注册的 JD，去掉已过期的。"""
+        now = time.monotonic()
+        if now - self._synced_at < max_age:
+            return
+        self._synced_at = now
+        stored = set(list_job_ids())
+        for job_id in [j for j in self.ids() if j not in stored]:
+            self.remove(job_id)
+        for job_id in stored:
+            if job_id in self:
+                continue
+            data = get_cached_job(job_id)
+            if data:
+                self.add(job_id, profile_signature(data))
+
+
+def profile_signature(data: Dict[str, Any]) -> List[int]:
+    # 旧版本缓存的 JobProfile 没有签名，现算一次
+    return data.get("minhash") or minhash_signature(data.get("text", ""))
+
+
+def find_near_duplicates(
+    job_id: str, signature: List[int], threshold: Optional[float] = None
+) -> List[Tuple[str, float]]:
+    threshold = JD_SIMILARITY_THRESHOLD if threshold is None else threshold
+    if threshold <= 0:
+        return []
+    job_index.sync()
+    return job_index.similar(job_id, signature, threshold)
+
+
+job_index = JobIndex()
@@ -0,0 +1,306 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+# 供应商配额（每个 worker），按账户限额除以 worker 数配置
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "2"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))  # 单次请求
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "60"))  # 含重试的总时长
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+
+@lru_cache(maxsize=None)
+def _retryable() -> Tuple[Type[BaseException], ...]:
+    # 用到时才导入 openai，冷启动不加载 SDK；发起调用前客户端已经导入过它
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        asyncio.TimeoutError,
+    )
+
+
+class LLMUnavailableError(Exception):
+    """熔断打开或重试耗尽，调用方应降级（本地打分）或返回 503。"""
+
+
+class TokenBucket:
+    """每分钟 rate 个令牌、容量 rate 的令牌桶；不足时排队等待补充。"""
+
+    def __init__(self, rate_per_min: float) -> None:
+        self.capacity = float(rate_per_min)
+        self.rate = rate_per_min / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # 单次请求超过桶容量时按容量算，否则永远等不到
+        amount = min(amount, self.capacity)
+        async with self._lock:  # 先到先得，大请求不会被小请求饿死
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """按实际用量修正：delta 为实际 - 预估，可为负（退还）。"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class AdaptiveLimiter:
+    """AIMD 并发上限：成功时每轮加 1，遇到限流/超时减半。"""
+
+    DECREASE_INTERVAL = 1.0  # 同一波失败只减一次
+
+    def __init__(self, max_limit: int, min_limit: int = 1) -> None:
+        self.max_limit = max_limit
+        self.min_limit = max(1, min(min_limit, max_limit))
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters: "Deque[asyncio.Future[None]]" = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self._wake()  # 被唤醒后又取消，把名额让给下一个
+                raise
+            finally:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+        self.in_flight += 1
+
+    def release(self, overloaded: bool = False) -> None:
+        self.in_flight -= 1
+        if overloaded:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.DECREASE_INTERVAL:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit / 2)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+
+class CircuitBreaker:
+    """连续失败 failures 次后打开，cooldown 秒后放一个探测请求（半开）。
+
+    只有超时、连接错误和 5xx 算失败；限流（429）由 AdaptiveLimiter 和退避处理。
+    """
+
+    def __init__(self, failures: int, cooldown: float) -> None:
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def check(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise LLMUnavailableError("AI 服务暂时不可用，请稍后重试")
+
+    def record_success(self) -> None:
+        self.consecutive = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive += 1
+        if self._probing or self.consecutive >= self.failures:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon_probe(self) -> None:
+        """探测请求没能真正发出（排队超时、被取消），让下一个请求继续探测。"""
+        self._probing = False
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is None:
+        return None
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """所有 LLM 请求的统一入口：限速、自适应并发、带截止时间的重试、熔断。"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rpm: int = LLM_RPM,
+        tpm: int = LLM_TPM,
+        min_concurrency: int = LLM_MIN_CONCURRENCY,
+        request_timeout: float = LLM_REQUEST_TIMEOUT,
+        deadline: float = LLM_DEADLINE,
+        max_retries: int = LLM_MAX_RETRIES,
+    ) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.limiter = AdaptiveLimiter(max_concurrency, min_concurrency)
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN)
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self._stats = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "throttled": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        est_tokens: int = 0,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """执行 fn()，est_tokens 为预估的输入+输出 token 数，用于 TPM 限速。"""
+        import openai
+
+        self.breaker.check()
+        self._stats["calls"] += 1
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                await asyncio.wait_for(self._admit(est_tokens), max(remaining, 0.001))
+            except asyncio.TimeoutError:
+                self.breaker.abandon_probe()
+                self._stats["failed"] += 1
+                raise LLMUnavailableError("AI 服务繁忙，请稍后重试")
+            except BaseException:
+                self.breaker.abandon_probe()
+                raise
+
+            try:
+                timeout = min(self.request_timeout, deadline_at - time.monotonic())
+                result = await asyncio.wait_for(fn(), max(timeout, 0.001))
+            except _retryable() as e:
+                throttled = isinstance(e, openai.RateLimitError)
+                self.limiter.release(overloaded=True)
+                if throttled:
+                    # 429 是配额用满，上游是通的：只降并发、退避，不计入熔断，
+                    # 否则持续限流会打开熔断，把全部流量挡成 503
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                if (
+                    attempt > self.max_retries
+                    or time.monotonic() + delay >= deadline_at
+                    or self.breaker.state != "closed"
+                ):
+                    self._stats["failed"] += 1
+                    raise LLMUnavailableError("AI 服务暂时不可用，请稍后重试") from e
+                if throttled:
+                    self._stats["throttled"] += 1
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+                continue
+            except openai.APIStatusError:
+                # 请求本身有问题（4xx），重试无意义；上游是通的，不算故障
+                self.limiter.release()
+                self.breaker.record_success()
+                self._stats["failed"] += 1
+                raise
+            except BaseException:
+                self.limiter.release()
+                self.breaker.abandon_probe()
+                raise
+
+            self.limiter.release()
+            self.breaker.record_success()
+            self._stats["succeeded"] += 1
+            usage = getattr(result, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.tokens.adjust(usage.total_tokens - est_tokens)
+                self._stats["prompt_tokens"] += usage.prompt_tokens or 0
+                self._stats["completion_tokens"] += usage.completion_tokens or 0
+            return result
+
+    async def _admit(self, est_tokens: int) -> None:
+        await self.requests.acquire(1)
+        if est_tokens:
+            await self.tokens.acquire(est_tokens)
+        await self.limiter.acquire()
+
+    @staticmethod
+    def _backoff(attempt: int, exc: BaseException) -> float:
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, BACKOFF_BASE)
+        # full jitter
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "concurrency_limit": int(self.limiter.limit),
+            "in_flight": self.limiter.in_flight,
+            "breaker": self.breaker.state,
+            "breaker_rejected": self.breaker.rejected,
+            "rpm": int(self.requests.capacity),
+            "tpm": int(self.tokens.capacity),
+        }
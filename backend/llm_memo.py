@@ -0,0 +1,216 @@
+"""LLM 回复的内容寻址缓存：按 (提示词版本, 模型, 温度, 完整 messages) 的摘要存取。
+
+HTTP 层的简历 / 匹配缓存按 resume_id、job_id 命中；这里按 LLM 的实际输入命中，
+同样的输入不管从哪个接口、哪个 resume_id、哪个批处理工具过来都只付费一次。
+改了提示词就把对应的版本号加一，旧结果不再命中，由 purge_versions 定期清掉。
+回复用 zlib 压缩后存进独立的 SQLite 文件，同机多个 worker 共享，重启不丢。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+# 设为空字符串关闭
+LLM_MEMO_PATH = os.getenv("LLM_MEMO_PATH", "llm_memo.sqlite3")
+LLM_MEMO_TTL = int(os.getenv("LLM_MEMO_TTL", str(30 * 24 * 3600)))
+# 超出条目数或压缩后字节数上限时，清理时淘汰最早写入的条目
+LLM_MEMO_MAX_ENTRIES = int(os.getenv("LLM_MEMO_MAX_ENTRIES", "200000"))
+LLM_MEMO_MAX_MB = int(os.getenv("LLM_MEMO_MAX_MB", "512"))
+# 每百万 token 的美元价格，用于估算命中节省的费用（默认 gpt-4o-mini）
+LLM_PRICE_INPUT_PER_1M = float(os.getenv("LLM_PRICE_INPUT_PER_1M", "0.15"))
+LLM_PRICE_OUTPUT_PER_1M = float(os.getenv("LLM_PRICE_OUTPUT_PER_1M", "0.60"))
+
+
+def memo_key(
+    version: str, model: str, temperature: float, messages: List[Dict[str, str]]
+) -> str:
+    payload = json.dumps(
+        [version, model, temperature, messages],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMMemo:
+    """path 为空时不做任何缓存，get 恒返回 None。"""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: int = LLM_MEMO_TTL,
+        max_entries: int = LLM_MEMO_MAX_ENTRIES,
+        max_bytes: int = LLM_MEMO_MAX_MB * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "saved_prompt_tokens": 0,
+            "saved_completion_tokens": 0,
+        }
+        # (条目数, 字节数)：写入时累加，清理时按库里的实际值校正；None 表示还没统计过
+        self._totals: Optional[List[int]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _conn(self) -> sqlite3.Connection:
+        # 第一次用到时才打开，不拖慢启动
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_memo ("
+                " key TEXT PRIMARY KEY,"
+                " version TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL,"
+                " completion_tokens INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_memo_created"
+                " ON llm_memo (created_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for field, n in deltas.items():
+                self._stats[field] += n
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        row = self._conn().execute(
+            "SELECT value, prompt_tokens, completion_tokens, expires_at"
+            " FROM llm_memo WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None or row[3] <= time.time():
+            self._count(misses=1)
+            return None
+        value, prompt_tokens, completion_tokens, _ = row
+        self._count(
+            hits=1,
+            saved_prompt_tokens=prompt_tokens,
+            saved_completion_tokens=completion_tokens,
+        )
+        return zlib.decompress(value).decode("utf-8")
+
+    def set(
+        self,
+        key: str,
+        version: str,
+        model: str,
+        content: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        value = zlib.compress(content.encode("utf-8"))
+        self._conn().execute(
+            "INSERT OR REPLACE INTO llm_memo"
+            " (key, version, model, value, prompt_tokens, completion_tokens,"
+            "  created_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                version,
+                model,
+                value,
+                prompt_tokens,
+                completion_tokens,
+                now,
+                now + self.ttl,
+            ),
+        )
+        with self._lock:
+            self._stats["stores"] += 1
+            # 覆盖已有 key 时会多算，下次清理时校正
+            if self._totals is not None:
+                self._totals[0] += 1
+                self._totals[1] += len(value)
+
+    def _scan_totals(self) -> List[int]:
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM llm_memo"
+        ).fetchone()
+        with self._lock:
+            self._totals = [entries, size]
+        return [entries, size]
+
+    def purge_versions(self, keep: Iterable[str]) -> int:
+        """删除不在 keep 中的提示词版本和已过期的条目，超出容量上限时再淘汰最早
+        写入的条目，返回删除条数。由缓存清理线程定期调用。"""
+        if not self.enabled:
+            return 0
+        keep = list(keep)
+        placeholders = ",".join("?" * len(keep)) or "NULL"
+        conn = self._conn()
+        removed = conn.execute(
+            f"DELETE FROM llm_memo WHERE version NOT IN ({placeholders})"
+            " OR expires_at <= ?",
+            (*keep, time.time()),
+        ).rowcount
+        entries, size = self._scan_totals()
+        if entries > self.max_entries or size > self.max_bytes:
+            # 按写入时间倒序累计，超出条目数或字节预算的部分淘汰
+            removed += conn.execute(
+                "DELETE FROM llm_memo WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key,"
+                "   ROW_NUMBER() OVER (ORDER BY created_at DESC) AS rn,"
+                "   SUM(LENGTH(value)) OVER (ORDER BY created_at DESC"
+                "    ROWS UNBOUNDED PRECEDING) AS running"
+                "  FROM llm_memo)"
+                " WHERE rn > ? OR running > ?)",
+                (self.max_entries, self.max_bytes),
+            ).rowcount
+            self._scan_totals()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["saved_usd"] = round(
+            (
+                stats["saved_prompt_tokens"] * LLM_PRICE_INPUT_PER_1M
+                + stats["saved_completion_tokens"] * LLM_PRICE_OUTPUT_PER_1M
+            )
+            / 1_000_000,
+            6,
+        )
+        stats["enabled"] = self.enabled
+        if self.enabled:
+            # 只在第一次统计时扫表，之后用累计值，不给每次 /metrics 加一次全表扫描
+            totals = self._totals or self._scan_totals()
+            stats["entries"], stats["bytes"] = totals
+            stats["max_entries"] = self.max_entries
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+llm_memo = LLMMemo(LLM_MEMO_PATH)
@@ -0,0 +1,220 @@
+"""进程内指标：计数器、直方图、各阶段耗时 span，以 Prometheus 文本格式导出。
+
+多 worker 部署时每个进程各自计数，由 Prometheus 按实例抓取后聚合。
+缓存、LLM 网关等已有统计在抓取时通过 collector 读取，热路径上不重复计数。
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 响应里附带 Server-Timing 头，便于在浏览器开发者工具里看各阶段耗时
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+# (指标名, 类型, 说明, [(标签, 值)])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}{label_str} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，最后一格为 +Inf）, 总和]
+        self._series: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        bounds = [*self.buckets, float("inf")]
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = _format_labels(
+                    (*self.labelnames, "le"), (*labels, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "resume_matcher_http_request_duration_seconds",
+    "HTTP 请求耗时",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "resume_matcher_stage_duration_seconds",
+    "请求内各处理阶段耗时",
+    ("stage",),
+)
+
+_metrics: List[Any] = [REQUEST_SECONDS, STAGE_SECONDS]
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def register(metric: Any) -> Any:
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]) -> None:
+    """抓取时调用 fn 读取现有统计，返回 (名称, counter|gauge, 说明, [(标签, 值)])。"""
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, help, samples in collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(
+                    f"{name}{_format_labels(labels.keys(), labels.values())} "
+                    f"{_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+# ---------- 阶段耗时 ----------
+
+# 当前请求已记录的阶段耗时，由 MetricsMiddleware 设置；不在请求内时为 None
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "stage_timings", default=None
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """记录一个处理阶段的耗时：写入直方图，并汇总到当前请求的 Server-Timing。"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> bytes:
+    merged: Dict[str, float] = {}
+    for stage, elapsed in timings:
+        merged[stage] = merged.get(stage, 0.0) + elapsed
+    merged["total"] = total
+    return ", ".join(
+        f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in merged.items()
+    ).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件：按路由模板统计请求耗时，可选附加 Server-Timing 头。"""
+
+    def __init__(self, app: Any, server_timing: bool = SERVER_TIMING) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append(
+                        (
+                            b"server-timing",
+                            _server_timing(timings, time.perf_counter() - started),
+                        )
+                    )
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _timings.reset(token)
+            # 用路由模板而不是实际路径，避免 resume_id 之类撑爆标签基数
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], route, str(status)
+            )
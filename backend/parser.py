@@ -1,24 +1,502 @@
+import asyncio
+import hashlib
 import io
-from typing import Tuple
-from PyPDF2 import PdfReader
+import multiprocessing
+import os
+import re
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
+from cache import cache_page_text, get_backend, get_cached_page_text
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_bytes))
-    texts = []
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        texts.append(page_text)
-    return "\n".join(texts)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+# 单次 worker 调用（整篇短文档或长文档的一个页段）的运行超时（秒），排队时间不计
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "20"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))  # 超出的页数直接忽略
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))  # 原始文本超出部分截断
+# 文本抽取后端：pypdf2（默认）、pypdf、pymupdf，后两者需另行安装
+PDF_EXTRACTOR = os.getenv("PDF_EXTRACTOR", "pypdf2")
+# 页数达到该值的文档按页段拆开，分给多个 worker 并行抽取
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))  # 每个页段的最少页数
+# 按页内容指纹缓存抽取结果，重复出现的页（改版后重新导出的简历、作品集）不再解析；
+# 页缓存在进程池 worker 里读写，缓存后端不跨进程共享时（memory）自动关闭，否则每个
+# worker 各攒一份看不见的 LRU
+PDF_PAGE_CACHE = os.getenv("PDF_PAGE_CACHE", "1") == "1"
+
+# 页指纹算法的版本，写进缓存键
+_PAGE_FINGERPRINT_VERSION = "page-2"
+
+# bytes 为内存中的 PDF，str 为落盘文件路径
+PdfSource = Union[bytes, str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+# 后台预热和请求可能同时创建进程池
+_pool_lock = threading.Lock()
+# 每个事件循环一个信号量，同时提交到进程池的任务不超过 worker 数
+_pool_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+# ---------- 抽取后端 ----------
+
+class PdfExtractor:
+    """PDF 文本抽取后端。各后端用到时才导入自己的库，未安装的后端只在选用时报错。"""
+
+    name = ""
+
+    def load(self) -> None:
+        """导入依赖库；未安装时抛出 ImportError。"""
+        raise NotImplementedError
+
+    @contextmanager
+    def open(self, source: PdfSource) -> Iterator[Any]:
+        """打开文档，产出传给下面几个方法的文档对象。"""
+        raise NotImplementedError
+        yield
+
+    def page_count(self, doc: Any) -> int:
+        raise NotImplementedError
+
+    def page_fingerprint(self, doc: Any, index: int) -> bytes:
+        """页面的原始内容：内容流加上展开后的资源（字体的 Encoding、ToUnicode、
+        嵌入字体等），相同则抽取结果相同；比抽取文本便宜得多。"""
+        raise NotImplementedError
+
+    def page_text(self, doc: Any, index: int) -> str:
+        raise NotImplementedError
+
+
+class PyPDF2Extractor(PdfExtractor):
+    name = "pypdf2"
+
+    def _reader_class(self) -> Any:
+        # 解析都在进程池里做，主进程启动时不必加载 PyPDF2
+        from PyPDF2 import PdfReader
+
+        return PdfReader
+
+    def load(self) -> None:
+        self._reader_class()
+
+    @contextmanager
+    def open(self, source: PdfSource) -> Iterator[Any]:
+        reader_class = self._reader_class()
+        # 同一文档各页共用的字体等对象只算一次摘要
+        self._digests: Dict[int, bytes] = {}
+        # 传路径时直接在文件上按需读取，不把整个 PDF 读进内存
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                yield reader_class(f)
+        else:
+            yield reader_class(io.BytesIO(source))
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc.pages)
+
+    def _object_digest(self, obj: Any, stack: Set[int]) -> bytes:
+        """对象连同它引用的间接对象一起做摘要；图片只取字典，不读数据。"""
+        idnum = getattr(obj, "idnum", None)
+        if idnum is not None:
+            if idnum in self._digests:
+                return self._digests[idnum]
+            if idnum in stack:
+                return b"R%d" % idnum
+            stack.add(idnum)
+            digest = self._object_digest(obj.get_object(), stack)
+            stack.discard(idnum)
+            self._digests[idnum] = digest
+            return digest
+        h = hashlib.sha256()
+        if isinstance(obj, dict):
+            h.update(b"<<")
+            # dict.get 取未解引用的原值，间接对象走上面的缓存
+            for key in sorted(obj):
+                if key != "/Parent":
+                    h.update(str(key).encode("utf-8", "replace"))
+                    h.update(self._object_digest(dict.get(obj, key), stack))
+            data = getattr(obj, "_data", None)
+            if data is not None and dict.get(obj, "/Subtype") != "/Image":
+                h.update(b"stream")
+                h.update(data if isinstance(data, bytes) else str(data).encode())
+        elif isinstance(obj, list):
+            h.update(b"[")
+            for item in obj:
+                h.update(self._object_digest(item, stack))
+        else:
+            h.update(repr(obj).encode("utf-8", "replace"))
+        return h.digest()
+
+    def page_fingerprint(self, doc: Any, index: int) -> bytes:
+        page = doc.pages[index]
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        resources = dict.get(page, "/Resources")
+        return (
+            data
+            + self._object_digest(resources, set())
+            + str(page.get("/Rotate", 0)).encode()
+        )
+
+    def page_text(self, doc: Any, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+
+class PypdfExtractor(PyPDF2Extractor):
+    """PyPDF2 的后继项目，接口相同，文本抽取更快。"""
+
+    name = "pypdf"
+
+    def _reader_class(self) -> Any:
+        from pypdf import PdfReader
+
+        return PdfReader
+
+
+class PyMuPDFExtractor(PdfExtractor):
+    """基于 MuPDF 的 C 实现，通常比纯 Python 的后端快一个数量级。"""
+
+    name = "pymupdf"
+
+    def load(self) -> None:
+        import fitz  # noqa: F401
+
+    @contextmanager
+    def open(self, source: PdfSource) -> Iterator[Any]:
+        import fitz
+
+        self._digests: Dict[int, bytes] = {}
+        if isinstance(source, str):
+            doc = fitz.open(source)
+        else:
+            doc = fitz.open(stream=source, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+
+    def page_count(self, doc: Any) -> int:
+        return doc.page_count
+
+    def _xref_digest(self, doc: Any, xref: int, stack: Set[int]) -> bytes:
+        if xref in self._digests:
+            return self._digests[xref]
+        if xref in stack:
+            return b"R%d" % xref
+        stack.add(xref)
+        source = doc.xref_object(xref, compressed=True)
+        h = hashlib.sha256(source.encode("utf-8", "replace"))
+        is_image = doc.xref_get_key(xref, "Subtype")[1] == "/Image"
+        if doc.xref_is_stream(xref) and not is_image:
+            h.update(doc.xref_stream_raw(xref))
+        h.update(self._refs_digest(doc, source, stack))
+        stack.discard(xref)
+        self._digests[xref] = digest = h.digest()
+        return digest
+
+    def _refs_digest(self, doc: Any, source: str, stack: Set[int]) -> bytes:
+        return b"".join(
+            self._xref_digest(doc, int(ref), stack) for ref in _REF_RE.findall(source)
+        )
+
+    def page_fingerprint(self, doc: Any, index: int) -> bytes:
+        page = doc[index]
+        # /Resources 可能继承自上层页树节点
+        xref = page.xref
+        kind, resources = doc.xref_get_key(xref, "Resources")
+        while kind == "null":
+            kind, parent = doc.xref_get_key(xref, "Parent")
+            if kind != "xref":
+                break
+            xref = int(parent.split()[0])
+            kind, resources = doc.xref_get_key(xref, "Resources")
+        return (
+            page.read_contents()
+            + resources.encode("utf-8", "replace")
+            + self._refs_digest(doc, resources, set())
+            + str(page.rotation).encode()
+        )
+
+    def page_text(self, doc: Any, index: int) -> str:
+        return doc[index].get_text() or ""
+
+
+# xref_object 源码中的间接引用，如 "12 0 R"
+_REF_RE = re.compile(r"(\d+) \d+ R\b")
+
+_EXTRACTORS = {
+    "pypdf2": PyPDF2Extractor,
+    "pypdf": PypdfExtractor,
+    "pymupdf": PyMuPDFExtractor,
+}
+
+
+def get_extractor(name: Optional[str] = None) -> PdfExtractor:
+    name = name or PDF_EXTRACTOR
+    if name not in _EXTRACTORS:
+        raise ValueError(f"未知的 PDF 抽取后端：{name}，可选 {', '.join(_EXTRACTORS)}")
+    return _EXTRACTORS[name]()
+
+
+def _page_text(extractor: PdfExtractor, doc: Any, index: int) -> str:
+    if not PDF_PAGE_CACHE or not get_backend().shared:
+        return extractor.page_text(doc, index)
+    # 不同后端抽出的文本不同，指纹里带上后端名；指纹算法改动时换掉前缀，旧条目作废
+    h = hashlib.sha256(f"{_PAGE_FINGERPRINT_VERSION}:{extractor.name}\0".encode())
+    h.update(extractor.page_fingerprint(doc, index))
+    digest = h.hexdigest()
+    text = get_cached_page_text(digest)
+    if text is None:
+        text = extractor.page_text(doc, index)
+        cache_page_text(digest, text)
+    return text
+
+
+# ---------- 文本抽取 ----------
+
+def iter_page_texts(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    extractor: Optional[str] = None,
+    start: int = 0,
+) -> Iterator[str]:
+    """逐页产出第 start 页到 max_pages 页之前的文本，取一页解析一页。"""
+    ext = get_extractor(extractor)
+    with ext.open(source) as doc:
+        stop = ext.page_count(doc)
+        if max_pages is not None:
+            stop = min(stop, max_pages)
+        for i in range(start, stop):
+            yield _page_text(ext, doc, i)
+
+
+def _limit_chars(pages: Iterable[str], max_chars: Optional[int]) -> Iterator[str]:
+    """累计字符数达到上限后截断并停止，后面的页不再解析。"""
+    remaining = max_chars
+    for text in pages:
+        if remaining is not None:
+            if len(text) >= remaining:
+                yield text[:remaining]
+                return
+            remaining -= len(text) + 1  # 页间换行
+        yield text
+
+
+def extract_text_from_pdf(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    extractor: Optional[str] = None,
+) -> str:
+    pages = iter_page_texts(source, max_pages, extractor)
+    return "\n".join(_limit_chars(pages, max_chars))
+
+
+def _clean_lines(text: str) -> Iterator[str]:
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            yield line
 
 
 def clean_text(text: str) -> str:
-    lines = [l.strip() for l in text.splitlines()]
-    lines = [l for l in lines if l]
-    return "\n".join(lines)
+    return "\n".join(_clean_lines(text))
+
+
+def _join_pages(pages: Iterable[str]) -> Tuple[str, str]:
+    """每页取出后立即清洗，内存里只保留原文和清洗结果各一份。"""
+    raw_pages: List[str] = []
+    cleaned_lines: List[str] = []
+    for text in pages:
+        raw_pages.append(text)
+        cleaned_lines.extend(_clean_lines(text))
+    return "\n".join(raw_pages), "\n".join(cleaned_lines)
+
+
+def parse_pdf_resume(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    extractor: Optional[str] = None,
+) -> Tuple[str, str]:
+    """单遍顺序解析，返回 (原文, 清洗后文本)。"""
+    pages = iter_page_texts(source, max_pages, extractor)
+    return _join_pages(_limit_chars(pages, max_chars))
+
+
+def extract_page_range(
+    source: PdfSource,
+    start: int,
+    stop: int,
+    max_chars: Optional[int] = None,
+    extractor: Optional[str] = None,
+) -> List[str]:
+    """抽取 [start, stop) 页，供进程池并行处理长文档。"""
+    pages = iter_page_texts(source, stop, extractor, start)
+    return list(_limit_chars(pages, max_chars))
+
+
+def _parse_if_short(
+    source: PdfSource,
+    max_pages: int,
+    max_chars: Optional[int],
+    extractor: Optional[str],
+    parallel_min_pages: int,
+) -> Tuple[int, Optional[Tuple[str, str]]]:
+    """返回 (页数, 解析结果)；页数达到并行阈值时不解析，结果为 None，由调用方拆分。"""
+    ext = get_extractor(extractor)
+    with ext.open(source) as doc:
+        n_pages = min(ext.page_count(doc), max_pages)
+        if n_pages >= parallel_min_pages:
+            return n_pages, None
+        pages = (_page_text(ext, doc, i) for i in range(n_pages))
+        return n_pages, _join_pages(_limit_chars(pages, max_chars))
+
+
+# ---------- 进程池解析 ----------
+
+def _mp_context() -> Any:
+    # 不用 fork：父进程里有清理线程、预热线程和 SQLite 连接，fork 出的子进程可能
+    # 卡在被复制的锁上
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS, mp_context=_mp_context()
+            )
+        return _pool
+
+
+def _get_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _pool_slots.get(loop)
+    if slots is None:
+        slots = _pool_slots[loop] = asyncio.Semaphore(PDF_WORKERS)
+    return slots
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    """超时后 worker 可能还卡在病态 PDF 上，直接杀掉整个进程池重建。
+
+    只处理出问题的那个进程池：它若已被别的任务重建过，不能再杀掉新池。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    for proc in list((pool._processes or {}).values()):
+        proc.terminate()
+    # 不取消排队中的任务：worker 被杀后它们统一以 BrokenProcessPool 结束，由调用方重试
+    pool.shutdown(wait=False)
+
+
+def _warm_worker(extractor: Optional[str]) -> None:
+    get_extractor(extractor).load()
+
+
+def warm_pool(extractor: Optional[str] = None) -> int:
+    """启动预热：拉起 worker 进程并导入抽取后端的库，返回进程池中的 worker 数。"""
+    pool = _get_pool()
+    for fut in [pool.submit(_warm_worker, extractor) for _ in range(PDF_WORKERS)]:
+        fut.result()
+    return len(pool._processes or {})
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def parse_pdf_resume_async(
+    source: PdfSource,
+    timeout: float = PDF_TIMEOUT,
+    max_pages: int = PDF_MAX_PAGES,
+    max_chars: int = PDF_MAX_CHARS,
+    extractor: Optional[str] = None,
+    parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES,
+) -> Tuple[str, str]:
+    """在进程池中解析 PDF，不占用事件循环；超时抛出 asyncio.TimeoutError。
+
+    短文档由一个 worker 一次解析完；长文档拆成页段（每段至少 PDF_PAGES_PER_TASK 页）
+    分给多个 worker 并行抽取。传路径时只有路径跨进程传递，worker 自己按需读文件；
+    传 bytes 时每个页段都要复制一份，长文档最好先落盘。
+
+    timeout 限制的是每次 worker 调用的运行时间：先等到空闲 worker 再提交并开始计时，
+    导入高峰时在队列里等待不会让正常文档超时、连带杀掉进程池。
+    """
+    loop = asyncio.get_running_loop()
+    if PDF_WORKERS < 2:
+        parallel_min_pages = max_pages + 1
+    slots = _get_slots()
+
+    async def _call(pool: ProcessPoolExecutor, fn: Any, *args: Any) -> Any:
+        async with slots:
+            if pool._shutdown_thread:
+                # 排队期间进程池已被其他任务杀掉重建，按进程池故障处理、由调用方重试
+                raise BrokenProcessPool("进程池已重建")
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, fn, *args), timeout
+            )
 
+    async def _run(pool: ProcessPoolExecutor) -> Tuple[str, str]:
+        n_pages, parsed = await _call(
+            pool,
+            _parse_if_short,
+            source,
+            max_pages,
+            max_chars,
+            extractor,
+            parallel_min_pages,
+        )
+        if parsed is not None:
+            return parsed
+        # 每个页段都要重新打开文档，段数不超过 worker 数
+        step = max(PDF_PAGES_PER_TASK, -(-n_pages // PDF_WORKERS))
+        chunks = await asyncio.gather(
+            *(
+                _call(
+                    pool,
+                    extract_page_range,
+                    source,
+                    start,
+                    min(start + step, n_pages),
+                    max_chars,
+                    extractor,
+                )
+                for start in range(0, n_pages, step)
+            )
+        )
+        pages = (text for chunk in chunks for text in chunk)
+        return _join_pages(_limit_chars(pages, max_chars))
 
-def parse_pdf_resume(file_bytes: bytes) -> Tuple[str, str]:
-    raw = extract_text_from_pdf(file_bytes)
-    cleaned = clean_text(raw)
-    return raw, cleaned
+    pool = _get_pool()
+    try:
+        return await _run(pool)
+    except asyncio.TimeoutError:
+        _reset_pool(pool)
+        raise
+    except BrokenProcessPool:
+        _reset_pool(pool)
+    # 多半是同池的其他任务超时把进程池杀了，在新池上重试一次；
+    # 再失败才当作这个文档本身的问题
+    pool = _get_pool()
+    try:
+        return await _run(pool)
+    except (asyncio.TimeoutError, BrokenProcessPool):
+        _reset_pool(pool)
+        raise
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from ai_utils import compute_resume_id, compute_upload_digest, extract_key_info_async
+from cache import (
+    DEFAULT_TTL,
+    SingleFlight,
+    cache_resume,
+    get_cached_resume,
+    get_indexed_upload,
+    index_upload,
+)
+from facets import facet_index
+from metrics import span
+from models import ResumeFullInfo, ResumeKeyInfo, ResumeParsed
+from parser import PdfSource, parse_pdf_resume_async
+from search import resume_index
+
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "10"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# multipart 的分隔行、字段头等额外开销，按请求体限制上传大小时留出余量
+MULTIPART_OVERHEAD = 64 * 1024
+
+# 单条上传、批量导入共用：同一文件 / 同一简历 / 同一匹配在进程内只算一次
+flights = SingleFlight()
+
+
+class IngestError(Exception):
+    """简历无法入库（解析失败、无文本等），status_code 供 HTTP 接口直接使用。"""
+
+    def __init__(self, detail: str, status_code: int = 400) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+async def spool_upload(
+    upload: UploadFile, max_mb: int = UPLOAD_MAX_MB
+) -> Tuple[str, str]:
+    """把上传内容分块写入临时文件，边写边算哈希，返回 (路径, 文件哈希)。
+
+    走到这里时 Starlette 已经收完请求体并缓存进 UploadFile，过大的请求要靠
+    BodySizeLimitMiddleware 在解析之前拒绝；这里按文件本身的大小精确校验，
+    超过 max_mb 中止并删除临时文件。调用方负责最终删除返回的路径。
+    """
+    max_bytes = max_mb * 1024 * 1024
+    if upload.size is not None and upload.size > max_bytes:
+        raise IngestError(f"文件超过 {max_mb}MB", status_code=413)
+
+    fd, path = tempfile.mkstemp(prefix="resume-upload-", suffix=".pdf")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise IngestError(f"文件超过 {max_mb}MB", status_code=413)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard_upload(path)
+        raise
+    return path, digest.hexdigest()
+
+
+class BodySizeLimitMiddleware:
+    """纯 ASGI 中间件：按路径限制请求体大小，在 Starlette 解析 multipart、落盘之前拒绝。
+
+    声明了 Content-Length 的请求直接按它拒绝，不读请求体；分块传输的请求边收边计数，
+    超出即中止读取，返回 413。limits 为 {路径: 最大字节数}。
+    """
+
+    def __init__(self, app: Any, limits: Dict[str, int]) -> None:
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        limit = None
+        if scope["type"] == "http":
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"请求体超过 {limit / 1024 / 1024:.0f}MB"
+        declared = dict(scope.get("headers", [])).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 413,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def _receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI 解析请求体时原样抛出 HTTPException
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, _receive, send)
+
+
+def discard_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_cached_upload(file_digest: str) -> Optional[Dict[str, Any]]:
+    """同一个文件重复上传：按字节哈希直接命中缓存，跳过解析和 LLM。"""
+    with span("cache_lookup"):
+        known_id = get_indexed_upload(file_digest)
+        return get_cached_resume(known_id) if known_id else None
+
+
+async def parse_upload(source: PdfSource) -> Tuple[str, str, str]:
+    """解析 PDF（字节或文件路径），返回 (resume_id, raw_text, cleaned_text)。"""
+    try:
+        with span("pdf_parse"):
+            raw_text, cleaned_text = await parse_pdf_resume_async(source)
+    except asyncio.TimeoutError:
+        raise IngestError("简历解析超时，请检查 PDF 文件", status_code=422)
+    except Exception:
+        raise IngestError("无法解析 PDF 文件")
+
+    if not cleaned_text.strip():
+        raise IngestError("无法从简历中提取文本")
+
+    return compute_resume_id(cleaned_text), raw_text, cleaned_text
+
+
+async def extract_and_cache(
+    resume_id: str, raw_text: str, cleaned_text: str, ttl: int = DEFAULT_TTL
+) -> Dict[str, Any]:
+    parsed = ResumeParsed(raw_text=raw_text, cleaned_text=cleaned_text)
+    key_info: ResumeKeyInfo = await extract_key_info_async(cleaned_text)
+
+    full_info = ResumeFullInfo(
+        resume_id=resume_id,
+        parsed=parsed,
+        key_info=key_info,
+    )
+
+    result = {"resume": full_info.dict()}
+    with span("cache_store"):
+        cache_resume(resume_id, result, ttl)
+        resume_index.add_record(resume_id, result)
+        facet_index.add_record(resume_id, result)
+    return result
+
+
+async def parse_spooled_upload(path: str, file_digest: str) -> Tuple[str, str, str]:
+    """解析 spool_upload 落盘的文件，并接管删除该文件。
+
+    同一文件的并发上传只解析一次：执行解析的那次调用在解析结束后删除自己的文件，
+    其余调用者直接删除各自的文件，发起者中途断开也不会删掉正在解析的文件。
+    """
+    claimed = False
+
+    async def _parse() -> Tuple[str, str, str]:
+        try:
+            return await parse_upload(path)
+        finally:
+            discard_upload(path)
+
+    def _start() -> Awaitable[Tuple[str, str, str]]:
+        nonlocal claimed
+        claimed = True
+        return _parse()
+
+    try:
+        return await flights.do(f"parse:{file_digest}", _start)
+    finally:
+        if not claimed:
+            discard_upload(path)
+
+
+async def ingest_resume_file(path: str, file_digest: str) -> Tuple[Dict[str, Any], bool]:
+    """spool_upload 的结果 -> 缓存中的 ResumeFullInfo，并删除临时文件。"""
+    cached = get_cached_upload(file_digest)
+    if cached:
+        discard_upload(path)
+        return cached, True
+    resume_id, raw_text, cleaned_text = await parse_spooled_upload(path, file_digest)
+    return await _extract_parsed(file_digest, resume_id, raw_text, cleaned_text)
+
+
+async def ingest_resume_bytes(
+    file_bytes: bytes, ttl: Optional[int] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """上传字节 -> 缓存中的 ResumeFullInfo。返回 (结果, 是否命中缓存)。
+
+    ttl 为缓存保留时间，默认 DEFAULT_TTL；显式传入时已缓存的条目也按它顺延。
+    """
+    with span("hash"):
+        file_digest = compute_upload_digest(file_bytes)
+    cached = get_cached_upload(file_digest)
+    if cached:
+        if ttl is not None:
+            resume_id = cached["resume"]["resume_id"]
+            cache_resume(resume_id, cached, ttl)
+            index_upload(file_digest, resume_id, ttl)
+        return cached, True
+
+    # 同一文件的并发上传只解析一次
+    resume_id, raw_text, cleaned_text = await flights.do(
+        f"parse:{file_digest}", lambda: parse_upload(file_bytes)
+    )
+    return await _extract_parsed(
+        file_digest, resume_id, raw_text, cleaned_text, ttl
+    )
+
+
+async def _extract_parsed(
+    file_digest: str,
+    resume_id: str,
+    raw_text: str,
+    cleaned_text: str,
+    ttl: Optional[int] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    cached = get_cached_resume(resume_id)
+    hit = cached is not None
+    if not hit:
+        cached = await flights.do(
+            f"resume:{resume_id}",
+            lambda: extract_and_cache(
+                resume_id, raw_text, cleaned_text, ttl or DEFAULT_TTL
+            ),
+        )
+    elif ttl is not None:
+        cache_resume(resume_id, cached, ttl)
+    index_upload(file_digest, resume_id, ttl or DEFAULT_TTL)
+    return cached, hit
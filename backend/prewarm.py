@@ -0,0 +1,151 @@
+"""离线批量导入：遍历目录中的 PDF，写入 app.py 使用的同一个缓存后端。
+
+用法：
+    CACHE_BACKEND=sqlite CACHE_PATH=/data/resume_cache.sqlite3 \\
+        python prewarm.py /data/resumes --concurrency 8 --checkpoint prewarm.ckpt
+
+可中断、可续跑：已记录在 checkpoint 中、大小/修改时间未变且结果仍在缓存里的文件
+直接跳过；内容哈希已在缓存里的文件只读一次、不解析也不调用 LLM。
+写入的条目按 --ttl 保留（默认 30 天），不会像在线上传那样一小时后就被清理。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, Tuple
+
+PREWARM_TTL = 30 * 24 * 3600
+
+
+def _iter_pdfs(root: str) -> Iterator[str]:
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(dirpath, name)
+
+
+def _load_checkpoint(path: str) -> Dict[str, Tuple[int, float, str]]:
+    done: Dict[str, Tuple[int, float, str]] = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 上次中断时写了一半的行
+            # 早期版本的 checkpoint 没有记录文件哈希
+            done[rec["path"]] = (rec["size"], rec["mtime"], rec.get("digest", ""))
+    return done
+
+
+async def _prewarm(args: argparse.Namespace) -> int:
+    # 依赖环境变量的模块放到参数解析之后再导入
+    from ai_utils import compute_upload_digest
+    from parser import shutdown_pool
+    from pipeline import IngestError, get_cached_upload, ingest_resume_bytes
+
+    done = _load_checkpoint(args.checkpoint)
+    ckpt = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+    semaphore = asyncio.Semaphore(args.concurrency)
+    stats = {"seen": 0, "skipped": 0, "cached": 0, "ingested": 0, "failed": 0}
+    started = time.time()
+    last_report = started
+
+    def _report(final: bool = False) -> None:
+        elapsed = max(time.time() - started, 1e-6)
+        processed = stats["cached"] + stats["ingested"] + stats["failed"]
+        print(
+            f"[prewarm] {'done' if final else 'progress'} "
+            f"seen={stats['seen']} skipped={stats['skipped']} cached={stats['cached']} "
+            f"ingested={stats['ingested']} failed={stats['failed']} "
+            f"elapsed={elapsed:.1f}s docs/sec={processed / elapsed:.2f}",
+            file=sys.stderr,
+        )
+
+    async def _one(path: str, size: int, mtime: float) -> None:
+        try:
+            with open(path, "rb") as f:
+                file_bytes = f.read()
+            _, hit = await ingest_resume_bytes(file_bytes, args.ttl)
+            stats["cached" if hit else "ingested"] += 1
+            if ckpt is not None:
+                rec = {
+                    "path": path,
+                    "size": size,
+                    "mtime": mtime,
+                    "digest": compute_upload_digest(file_bytes),
+                }
+                ckpt.write(json.dumps(rec) + "\n")
+                ckpt.flush()
+        except IngestError as e:
+            stats["failed"] += 1
+            print(f"[prewarm] failed {path}: {e.detail}", file=sys.stderr)
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[prewarm] failed {path}: {e!r}", file=sys.stderr)
+        finally:
+            semaphore.release()
+
+    pending = set()
+    try:
+        for path in _iter_pdfs(args.directory):
+            stats["seen"] += 1
+            st = os.stat(path)
+            rec = done.get(path)
+            # 结果可能已过期被清理，缓存里还在才跳过，否则重新导入
+            if (
+                rec is not None
+                and rec[:2] == (st.st_size, st.st_mtime)
+                and get_cached_upload(rec[2])
+            ):
+                stats["skipped"] += 1
+                continue
+            await semaphore.acquire()
+            task = asyncio.ensure_future(_one(path, st.st_size, st.st_mtime))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            if time.time() - last_report >= args.report_interval:
+                last_report = time.time()
+                _report()
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        if ckpt is not None:
+            ckpt.close()
+        shutdown_pool()
+        _report(final=True)
+    return 1 if stats["failed"] else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="把目录中的 PDF 简历预先写入缓存")
+    ap.add_argument("directory", help="简历目录（递归遍历）")
+    ap.add_argument(
+        "--concurrency", type=int, default=8, help="同时在途的 LLM 关键信息提取数"
+    )
+    ap.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="PDF 解析进程数"
+    )
+    ap.add_argument("--checkpoint", default="prewarm.ckpt", help="进度文件，传空字符串关闭")
+    ap.add_argument(
+        "--ttl", type=int, default=PREWARM_TTL, help="写入缓存的保留时间（秒）"
+    )
+    ap.add_argument("--report-interval", type=float, default=5.0, help="进度输出间隔（秒）")
+    args = ap.parse_args()
+
+    if os.getenv("CACHE_BACKEND", "sqlite") == "memory":
+        print("[prewarm] CACHE_BACKEND=memory 时结果无法被 app.py 读取", file=sys.stderr)
+        return 2
+
+    os.environ["PDF_WORKERS"] = str(args.workers)
+    # 解析进程比 LLM 并发多时，让文件队列能喂满两者
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    args.concurrency = max(args.concurrency, args.workers)
+    return asyncio.run(_prewarm(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from models import JobProfile, MatchScore
+from search import term_counts
+
+# ---------- 学历 / 年限解析 ----------
+
+# 数值越大学历越高
+_DEGREE_PATTERNS = [
+    (4, re.compile(r"博士|ph\.?\s?d|doctor", re.I)),
+    (3, re.compile(r"硕士|研究生|master|m\.?sc\b|\bm\.s\b|\bmba\b", re.I)),
+    (2, re.compile(r"本科|学士|bachelor|\bb\.?sc?\b|\bb\.?a\b|undergraduate", re.I)),
+    (1, re.compile(r"大专|专科|associate", re.I)),
+]
+_YEARS_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(?:\+\s*)?(?:年以上|年及以上|年|years?|yrs?)", re.I
+)
+
+SKILL_WEIGHT = 0.5
+EXPERIENCE_WEIGHT = 0.3
+EDUCATION_WEIGHT = 0.2
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_LEN = 400.0  # 固定参考长度，保证同一对简历/JD 的分数与批次无关
+MAX_JD_TERMS = 64
+
+
+def _degree_levels(text: str) -> List[int]:
+    return [level for level, pattern in _DEGREE_PATTERNS if pattern.search(text)]
+
+
+def parse_degree_level(text: Optional[str]) -> Optional[int]:
+    """候选人的最高学历等级：1 大专，2 本科，3 硕士，4 博士。"""
+    levels = _degree_levels(text or "")
+    return max(levels) if levels else None
+
+
+def parse_required_degree(job_text: str) -> Optional[int]:
+    """JD 的最低学历要求，例如“本科及以上”取本科。"""
+    levels = _degree_levels(job_text)
+    return min(levels) if levels else None
+
+
+def parse_required_years(job_text: str) -> Optional[float]:
+    years = [float(m.group(1)) for m in _YEARS_RE.finditer(job_text)]
+    years = [y for y in years if 0 < y <= 40]
+    return min(years) if years else None
+
+
+# ---------- 本地打分（不依赖 LLM） ----------
+
+def local_match_scores(
+    resume_texts: List[str],
+    key_infos: List[Dict[str, Any]],
+    job: JobProfile,
+) -> List[MatchScore]:
+    """对一个 JD 批量计算多份简历的本地匹配分，返回与 LLM 相同的 MatchScore 字段。
+
+    技能分：JD 词项按其在 JD 中的词频加权，统计在简历中的 BM25 饱和词频覆盖率；
+    经验分、学历分取自 ResumeKeyInfo 与 JD 预处理时解析出的要求。
+    """
+    n = len(resume_texts)
+    if n == 0:
+        return []
+
+    jd = job.term_counts
+    terms = list(jd)
+    col = {t: j for j, t in enumerate(terms)}
+    tf = np.zeros((n, len(terms)), dtype=np.float32)
+    doc_len = np.zeros(n, dtype=np.float32)
+    for i, text in enumerate(resume_texts):
+        counts = term_counts(text)
+        doc_len[i] = sum(counts.values())
+        for t, c in counts.items():
+            j = col.get(t)
+            if j is not None:
+                tf[i, j] = c
+
+    # 技能分
+    if terms:
+        weights = np.array([jd[t] for t in terms], dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / BM25_AVG_LEN)
+        sat = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+        skill = np.clip(sat, 0.0, 1.0) @ weights / weights.sum()
+    else:
+        skill = np.zeros(n, dtype=np.float32)
+
+    # 经验分
+    req_years = job.min_years
+    years = np.array(
+        [
+            np.nan if k.get("years_of_experience") is None else k["years_of_experience"]
+            for k in key_infos
+        ],
+        dtype=np.float32,
+    )
+    known = ~np.isnan(years)
+    if req_years:
+        exp = np.where(known, np.clip(np.nan_to_num(years) / req_years, 0.0, 1.0), 0.3)
+    else:
+        exp = np.where(known, 1.0, 0.5)
+
+    # 学历分
+    req_degree = job.min_degree
+    levels = np.array(
+        [
+            parse_degree_level(k.get("education_background") or text) or 0
+            for k, text in zip(key_infos, resume_texts)
+        ],
+        dtype=np.float32,
+    )
+    if req_degree:
+        gap = levels - req_degree
+        edu = np.where(gap >= 0, 1.0, np.where(gap == -1, 0.5, 0.2))
+        edu = np.where(levels == 0, 0.4, edu)
+    else:
+        edu = np.where(levels > 0, 1.0, 0.6)
+
+    overall = SKILL_WEIGHT * skill + EXPERIENCE_WEIGHT * exp + EDUCATION_WEIGHT * edu
+
+    results = []
+    for i in range(n):
+        matched = [terms[j] for j in np.flatnonzero(tf[i])]
+        matched.sort(key=lambda t: jd[t], reverse=True)
+        results.append(
+            MatchScore(
+                overall_score=round(float(overall[i]), 4),
+                skill_match_score=round(float(skill[i]), 4),
+                experience_match_score=round(float(exp[i]), 4),
+                education_match_score=round(float(edu[i]), 4),
+                keywords=matched[:10] or terms[:10],
+                scorer="local",
+            )
+        )
+    return results
+
+
+def local_match_score(
+    resume_text: str, key_info: Dict[str, Any], job: JobProfile
+) -> MatchScore:
+    return local_match_scores([resume_text], [key_info], job)[0]
@@ -0,0 +1,127 @@
+import math
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from cache import get_cached_resume, list_resume_ids
+
+# 英文/数字按单词切分（保留 c++、c#、node.js 这类写法），中文按二元组切分
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#._-]*[a-z0-9+#]|[a-z0-9]")
+_CJK_RE = re.compile(r"[\u4e00-\u9fa5]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower()
+    tokens = [t for t in _WORD_RE.findall(text) if len(t) > 1]
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def term_counts(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for t in tokenize(text):
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
+
+class ResumeIndex:
+    """已缓存简历的倒排索引，用 BM25 在本地做粗排。"""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {resume_id: tf}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, resume_id: str) -> bool:
+        with self._lock:
+            return resume_id in self._doc_len
+
+    def add(self, resume_id: str, text: str) -> None:
+        counts = term_counts(text)
+        with self._lock:
+            if resume_id in self._doc_len:
+                self._remove(resume_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[resume_id] = tf
+            self._doc_terms[resume_id] = list(counts)
+            length = sum(counts.values())
+            self._doc_len[resume_id] = length
+            self._total_len += length
+
+    def remove(self, resume_id: str) -> None:
+        with self._lock:
+            if resume_id in self._doc_len:
+                self._remove(resume_id)
+
+    def _remove(self, resume_id: str) -> None:
+        for term in self._doc_terms.pop(resume_id, []):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(resume_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(resume_id)
+
+    def search(self, terms: Iterable[str], limit: int) -> List[Tuple[str, float]]:
+        """terms 为查询词项（如 JobProfile.term_counts），返回 BM25 得分最高的 limit 份简历。"""
+        terms = set(terms)
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[str, float] = {}
+            # 只遍历包含查询词的文档，候选池再大也只和命中的 posting 数量有关
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for rid, tf in posting.items():
+                    dl = self._doc_len[rid]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * dl / avg_len)
+                    score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    scores[rid] = scores.get(rid, 0.0) + score
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+    def add_record(self, resume_id: str, data: Dict[str, Any]) -> None:
+        self.add(resume_id, data["resume"]["parsed"]["cleaned_text"])
+
+    def ids(self) -> List[str]:
+        # 预热线程里的 sync_from_store 会和请求处理同时读写
+        with self._lock:
+            return list(self._doc_len)
+
+
+def sync_from_store(*indexes: Any) -> None:
+    """与缓存后端对齐：补上其他 worker 写入的简历，去掉已过期的。
+
+    indexes 需实现 ids() / remove(resume_id) / add_record(resume_id, data) / in。
+    """
+    stored: Set[str] = set(list_resume_ids())
+    for index in indexes:
+        for rid in [r for r in index.ids() if r not in stored]:
+            index.remove(rid)
+    for rid in stored:
+        missing = [index for index in indexes if rid not in index]
+        if not missing:
+            continue
+        data = get_cached_resume(rid)
+        if data:
+            for index in missing:
+                index.add_record(rid, data)
+
+
+resume_index = ResumeIndex()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 模块按 backend/ 下的平铺方式互相导入；缓存用内存后端，不在仓库里落 SQLite 文件
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("LLM_MEMO_PATH", "")
+os.environ.setdefault("OPENAI_API_KEY", "test")
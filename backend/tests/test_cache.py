@@ -0,0 +1,119 @@
+import asyncio
+from typing import List
+
+from cache import LRUCache, SingleFlight
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = LRUCache("t", max_entries=2, max_bytes=10**6)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a 变为最近使用
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_enforces_byte_budget() -> None:
+    cache = LRUCache("t", max_entries=100, max_bytes=600)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 100)
+    stats = cache.stats()
+    assert stats["bytes"] <= 600
+    assert stats["entries"] < 10
+    assert cache.get("k9") is not None
+
+
+def test_lru_skips_entry_larger_than_budget() -> None:
+    cache = LRUCache("t", max_entries=100, max_bytes=200)
+    cache.set("small", "x")
+    cache.set("big", "x" * 1000)
+    assert cache.get("big") is None
+    assert cache.get("small") == "x"
+
+
+def test_lru_replacing_key_keeps_byte_count() -> None:
+    cache = LRUCache("t", max_entries=100, max_bytes=10**6)
+    cache.set("a", "x" * 100)
+    before = cache.stats()["bytes"]
+    cache.set("a", "x" * 100)
+    assert cache.stats()["bytes"] == before
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_ttl_expiry_and_sweep() -> None:
+    cache = LRUCache("t", max_entries=100, max_bytes=10**6)
+    cache.set("gone", 1, ttl=0)
+    cache.set("swept", 2, ttl=0)
+    cache.set("kept", 3, ttl=60)
+    assert cache.get("gone") is None
+    assert cache.keys() == ["kept"]
+    assert cache.sweep() == 1
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["expirations"] == 2
+
+
+# ---------- SingleFlight ----------
+
+def test_single_flight_runs_once_for_concurrent_callers() -> None:
+    calls: List[int] = []
+
+    async def compute() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main() -> List[str]:
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", compute) for _ in range(5)))
+        assert flights.in_flight() == 0
+        return results
+
+    assert asyncio.run(main()) == ["done"] * 5
+    assert len(calls) == 1
+
+
+def test_single_flight_survives_cancelled_caller() -> None:
+    async def main() -> str:
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def compute() -> str:
+            started.set()
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("k", compute))
+        await started.wait()
+        second = asyncio.ensure_future(flights.do("k", compute))
+        await asyncio.sleep(0)
+        first.cancel()  # 发起者断开
+        return await asyncio.wait_for(second, 1)
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_single_flight_shares_error_then_retries() -> None:
+    calls: List[int] = []
+
+    async def failing() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def ok() -> str:
+        return "ok"
+
+    async def main() -> str:
+        flights = SingleFlight()
+        results = await asyncio.gather(
+            flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        return await flights.do("k", ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert len(calls) == 1
@@ -0,0 +1,80 @@
+from jobsim import (
+    LSH_BANDS,
+    MINHASH_PERM,
+    JobIndex,
+    find_near_duplicates,
+    minhash_signature,
+    similarity,
+)
+
+JD = """Senior Python backend engineer
+5+ years building web services with Django or FastAPI
+Experience with Redis, PostgreSQL and Kafka
+Own the payment platform and mentor junior engineers
+Bachelor degree in computer science or related field
+薪资：30k-50k"""
+
+OTHER = """Frontend developer
+React and TypeScript for our design system
+Work closely with product designers on accessibility
+Two years of experience with modern CSS"""
+
+
+def test_signature_is_deterministic() -> None:
+    sig = minhash_signature(JD)
+    assert len(sig) == MINHASH_PERM
+    assert sig == minhash_signature(JD)
+    assert similarity(sig, sig) == 1.0
+
+
+def test_cosmetic_edits_stay_similar() -> None:
+    lines = JD.splitlines()
+    edited = "\n".join(
+        [line.upper() + "!" for line in reversed(lines[:-1])] + ["月薪 40k-60k"]
+    )
+    assert similarity(minhash_signature(JD), minhash_signature(edited)) >= 0.9
+
+
+def test_unrelated_jds_are_dissimilar() -> None:
+    assert similarity(minhash_signature(JD), minhash_signature(OTHER)) < 0.3
+
+
+def test_empty_text_has_no_signature() -> None:
+    assert minhash_signature("") == []
+    assert minhash_signature("薪资：面议") == []
+    assert similarity([], minhash_signature(JD)) == 0.0
+
+
+def test_job_index_finds_similar_jobs_only() -> None:
+    index = JobIndex()
+    sig = minhash_signature(JD)
+    near = minhash_signature(JD + "\nFlexible remote work")
+    index.add("orig", sig)
+    index.add("near", near)
+    index.add("other", minhash_signature(OTHER))
+    index.add("broken", [1, 2, 3])  # 签名长度不对，忽略
+    assert len(index) == 3
+
+    found = index.similar("orig", sig, 0.5)
+    assert [job_id for job_id, _ in found] == ["near"]
+    assert found[0][1] == similarity(sig, near)
+    # 自己的 job_id 不出现在结果里，同签名的其他 JD 排在最前
+    index.add("copy", sig)
+    assert index.similar("orig", sig, 0.5)[0] == ("copy", 1.0)
+    assert index.similar("orig", sig, 1.01) == []
+
+
+def test_job_index_remove_clears_buckets() -> None:
+    index = JobIndex()
+    sig = minhash_signature(JD)
+    index.add("a", sig)
+    assert len(index._buckets) == LSH_BANDS
+    index.remove("a")
+    index.remove("missing")
+    assert "a" not in index
+    assert not index._buckets
+    assert index.similar("b", sig, 0.5) == []
+
+
+def test_find_near_duplicates_disabled_by_zero_threshold() -> None:
+    assert find_near_duplicates("x", minhash_signature(JD), threshold=0) == []
@@ -0,0 +1,234 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+import llm_gateway
+from llm_gateway import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    LLMGateway,
+    LLMUnavailableError,
+    TokenBucket,
+)
+
+_REQUEST = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(llm_gateway.time, "monotonic", fake)
+    return fake
+
+
+# ---------- TokenBucket ----------
+
+def test_token_bucket_waits_for_refill() -> None:
+    async def main() -> float:
+        bucket = TokenBucket(6000)  # 每秒 100 个
+        await bucket.acquire(6000)
+        started = time.perf_counter()
+        await bucket.acquire(10)
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_token_bucket_clamps_oversized_request() -> None:
+    async def main() -> float:
+        bucket = TokenBucket(60)
+        await asyncio.wait_for(bucket.acquire(1000), 1)
+        return bucket.tokens
+
+    assert asyncio.run(main()) == pytest.approx(0, abs=1)
+
+
+def test_token_bucket_adjust_refunds_up_to_capacity(clock: FakeClock) -> None:
+    bucket = TokenBucket(600)
+    bucket.tokens = 100
+    bucket.adjust(-50)
+    assert bucket.tokens == 150
+    bucket.adjust(-10000)
+    assert bucket.tokens == bucket.capacity
+    bucket.adjust(700)
+    assert bucket.tokens == -100
+
+
+# ---------- AdaptiveLimiter ----------
+
+def test_limiter_blocks_at_limit() -> None:
+    async def main() -> None:
+        lim = AdaptiveLimiter(2)
+        await lim.acquire()
+        await lim.acquire()
+        third = asyncio.ensure_future(lim.acquire())
+        await asyncio.sleep(0)
+        assert not third.done()
+        lim.release()
+        await asyncio.wait_for(third, 1)
+        assert lim.in_flight == 2
+
+    asyncio.run(main())
+
+
+def test_limiter_passes_slot_on_when_woken_waiter_is_cancelled() -> None:
+    async def main() -> None:
+        lim = AdaptiveLimiter(1)
+        await lim.acquire()
+        first = asyncio.ensure_future(lim.acquire())
+        second = asyncio.ensure_future(lim.acquire())
+        await asyncio.sleep(0)
+        lim.release()  # 唤醒 first
+        first.cancel()  # first 还没来得及拿到名额就被取消
+        await asyncio.wait_for(second, 1)
+        assert first.cancelled()
+        assert lim.in_flight == 1
+        assert not lim._waiters
+
+    asyncio.run(main())
+
+
+def test_limiter_drops_cancelled_waiter() -> None:
+    async def main() -> None:
+        lim = AdaptiveLimiter(1)
+        await lim.acquire()
+        waiter = asyncio.ensure_future(lim.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert not lim._waiters
+        lim.release()
+        assert lim.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_limiter_aimd(clock: FakeClock) -> None:
+    lim = AdaptiveLimiter(16, min_limit=2)
+    lim.in_flight = 3
+    lim.release(overloaded=True)
+    assert lim.limit == 8
+    lim.release(overloaded=True)  # 同一波失败只减一次
+    assert lim.limit == 8
+    clock.now += AdaptiveLimiter.DECREASE_INTERVAL
+    lim.release(overloaded=True)
+    assert lim.limit == 4
+    for _ in range(4):
+        lim.in_flight += 1
+        lim.release()
+    assert lim.limit == pytest.approx(5, abs=0.1)
+    lim.limit = 2
+    clock.now += AdaptiveLimiter.DECREASE_INTERVAL
+    lim.in_flight += 1
+    lim.release(overloaded=True)
+    assert lim.limit == 2
+
+
+# ---------- CircuitBreaker ----------
+
+def test_breaker_opens_after_consecutive_failures(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failures=3, cooldown=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        breaker.check()
+    assert breaker.rejected == 1
+
+
+def test_breaker_half_open_allows_single_probe(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failures=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half_open"
+    breaker.check()  # 探测请求
+    with pytest.raises(LLMUnavailableError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.check()
+
+
+def test_breaker_failed_probe_reopens(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failures=5, cooldown=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    assert breaker.state == "open"
+
+
+def test_breaker_abandoned_probe_lets_next_request_probe(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failures=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.check()
+    breaker.abandon_probe()
+    breaker.check()
+    with pytest.raises(LLMUnavailableError):
+        breaker.check()
+
+
+# ---------- LLMGateway ----------
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(llm_gateway, "BACKOFF_BASE", 0.001)
+
+def _rate_limited() -> openai.RateLimitError:
+    response = httpx.Response(429, request=_REQUEST, headers={"retry-after": "0"})
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_gateway_rate_limits_do_not_open_breaker() -> None:
+    async def main() -> LLMGateway:
+        gw = LLMGateway(max_concurrency=8, rpm=60000, tpm=10**7, deadline=1)
+
+        async def throttled() -> None:
+            raise _rate_limited()
+
+        for _ in range(3):
+            with pytest.raises(LLMUnavailableError):
+                await gw.call(throttled)
+        return gw
+
+    gw = asyncio.run(main())
+    assert gw.breaker.state == "closed"
+    assert gw.stats()["throttled"] > 0
+    assert gw.limiter.limit < 8
+
+
+def test_gateway_connection_errors_open_breaker() -> None:
+    async def main() -> LLMGateway:
+        gw = LLMGateway(max_concurrency=8, rpm=60000, tpm=10**7, max_retries=10)
+
+        async def down() -> None:
+            raise openai.APIConnectionError(request=_REQUEST)
+
+        with pytest.raises(LLMUnavailableError):
+            await gw.call(down)
+        with pytest.raises(LLMUnavailableError):
+            await gw.call(down)
+        return gw
+
+    gw = asyncio.run(main())
+    assert gw.breaker.state == "open"
+    assert gw.stats()["breaker_rejected"] == 1
@@ -0,0 +1,173 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from rules import (
+    HEADER_LINES,
+    KEY_INFO_MIN_CONFIDENCE,
+    RULE_FIELDS,
+    extract_rule_fields,
+    split_confident,
+    text_for_fields,
+)
+
+CN_LABELLED = """个人简历
+姓名：张三
+电话：138 1234 5678
+邮箱：zhangsan@example.com
+现居地：北京市海淀区
+求职意向：后端开发工程师
+工作经验：5年
+学历：本科"""
+
+CN_UNLABELLED = """李四
+13912345678
+lisi@example.com
+教育背景
+2012-2016 清华大学 计算机科学 本科
+3年以上开发经验"""
+
+EN_LABELLED = """Name: John Smith
+Email: john@example.com
+Phone: +86 139-1234-5678
+Location: Shanghai
+Objective: Backend Engineer
+Education: Master of Science, Computer Science"""
+
+EN_UNLABELLED = """Jane Doe
+jane@example.com
+7+ years of software engineering experience
+B.S. in Computer Science, Stanford University"""
+
+
+# (简历, 期望的 {字段: (值, 置信度)})；未列出的字段不应被规则识别
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            CN_LABELLED,
+            {
+                "name": ("张三", 0.95),
+                "phone": ("13812345678", 0.95),
+                "email": ("zhangsan@example.com", 0.99),
+                "address": ("北京市海淀区", 0.85),
+                "job_intention": ("后端开发工程师", 0.9),
+                "years_of_experience": (5.0, 0.95),
+                "education_background": ("本科", 0.95),
+            },
+        ),
+        (
+            CN_UNLABELLED,
+            {
+                "name": ("李四", 0.6),
+                "phone": ("13912345678", 0.95),
+                "email": ("lisi@example.com", 0.99),
+                "years_of_experience": (3.0, 0.85),
+                "education_background": ("2012-2016 清华大学 计算机科学 本科", 0.85),
+            },
+        ),
+        (
+            EN_LABELLED,
+            {
+                "name": ("John Smith", 0.95),
+                "phone": ("13912345678", 0.95),
+                "email": ("john@example.com", 0.99),
+                "address": ("Shanghai", 0.85),
+                "job_intention": ("Backend Engineer", 0.9),
+                "education_background": ("Master of Science, Computer Science", 0.95),
+            },
+        ),
+        (
+            EN_UNLABELLED,
+            {
+                "name": ("Jane Doe", 0.55),
+                "email": ("jane@example.com", 0.99),
+                "years_of_experience": (7.0, 0.85),
+                "education_background": (
+                    "B.S. in Computer Science, Stanford University",
+                    0.85,
+                ),
+            },
+        ),
+    ],
+    ids=["cn-labelled", "cn-unlabelled", "en-labelled", "en-unlabelled"],
+)
+def test_extract_rule_fields(text: str, expected: Dict[str, Any]) -> None:
+    assert extract_rule_fields(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["教育背景\n工作经历\n张三", "Personal Information\nWork Experience\nJohn Smith"],
+)
+def test_headings_are_not_names(text: str) -> None:
+    # 标题行跳过，后面的短行才当作姓名，且置信度不够直接采用
+    name, confidence = extract_rule_fields(text)["name"]
+    assert name == text.splitlines()[-1]
+    assert confidence < KEY_INFO_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Scrum Master at Acme\nmastered Kubernetes", None),
+        (
+            "Scrum Master at Acme\nBachelor of Arts, Peking University",
+            ("Bachelor of Arts, Peking University", 0.85),
+        ),
+        # 没有学校名的英文学历不够确定，交给 LLM
+        (
+            "Scrum Master\nBachelor of Science in Physics",
+            ("Bachelor of Science in Physics", 0.6),
+        ),
+    ],
+)
+def test_scrum_master_is_not_a_degree(text: str, expected: Any) -> None:
+    assert extract_rule_fields(text).get("education_background") == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Education\n2015-09-01 2019-06-30", "学号：2019 0601 2345"],
+)
+def test_date_like_numbers_are_low_confidence_phones(text: str) -> None:
+    found = extract_rule_fields(text)
+    assert found["phone"][1] < KEY_INFO_MIN_CONFIDENCE
+    confident, missing = split_confident(found)
+    assert "phone" not in confident
+    assert "phone" in missing
+
+
+def test_split_confident() -> None:
+    found = {
+        "name": ("李四", 0.6),
+        "email": ("lisi@example.com", 0.99),
+        "phone": ("13912345678", 0.95),
+    }
+    confident, missing = split_confident(found)
+    assert confident == {"email": "lisi@example.com", "phone": "13912345678"}
+    assert missing == [f for f in RULE_FIELDS if f not in ("email", "phone")]
+
+    confident, missing = split_confident(found, min_confidence=0.5)
+    assert set(confident) == {"name", "email", "phone"}
+    assert "name" not in missing
+
+
+@pytest.mark.parametrize(
+    "fields, truncated",
+    [
+        (["name", "address"], True),
+        (["phone", "email", "job_intention"], True),
+        (["name", "years_of_experience"], False),
+        (["education_background"], False),
+    ],
+)
+def test_text_for_fields(fields: List[str], truncated: bool) -> None:
+    text = "\n".join(f"line {i}" for i in range(HEADER_LINES * 2))
+    expected = "\n".join(text.splitlines()[:HEADER_LINES]) if truncated else text
+    assert text_for_fields(text, fields) == expected
+
+
+def test_text_for_fields_skips_blank_lines() -> None:
+    text = "张三\n\n   \n13912345678\n"
+    assert text_for_fields(text, ["name", "phone"]) == "张三\n13912345678"
@@ -0,0 +1,71 @@
+"""冷启动：统计 app 导入耗时，启动后预热按需初始化的重依赖。
+
+openai SDK、PyPDF2、PDF 进程池、本地索引都改成第一次用到时才加载，
+新实例可以尽快开始接流量；预热把这些开销从第一个请求挪到启动阶段。
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# off：不预热，全部按需初始化；background：边接流量边在后台预热；
+# blocking：预热完成后才开始接流量（适合先做健康检查再导流的平台）
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+# app 导入耗时超过该秒数时在启动日志里提示
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+
+WarmupStep = Tuple[str, Callable[[], Any]]
+
+_report: Dict[str, Any] = {
+    "import_seconds": None,
+    "import_budget": IMPORT_TIME_BUDGET,
+    "warmup": STARTUP_WARMUP,
+    "warmup_status": "pending",
+    "warmup_seconds": None,
+    "steps": {},
+}
+
+
+def record_import(seconds: float) -> None:
+    _report["import_seconds"] = round(seconds, 4)
+    over = seconds > IMPORT_TIME_BUDGET
+    print(
+        f"[startup] app 导入耗时 {seconds * 1000:.0f}ms"
+        f"（预算 {IMPORT_TIME_BUDGET * 1000:.0f}ms{'，已超出' if over else ''}）",
+        file=sys.stderr,
+    )
+
+
+async def run_warmup(steps: List[WarmupStep]) -> None:
+    """依次在线程里执行预热步骤；单步失败只记录，不影响服务启动。"""
+    if STARTUP_WARMUP == "off":
+        _report["warmup_status"] = "skipped"
+        return
+    _report["warmup_status"] = "running"
+    started = time.perf_counter()
+    for name, fn in steps:
+        step_started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(fn)
+            _report["steps"][name] = {
+                "seconds": round(time.perf_counter() - step_started, 4),
+                "result": result,
+            }
+        except Exception as e:
+            _report["steps"][name] = {"error": str(e) or type(e).__name__}
+    _report["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    _report["warmup_status"] = "done"
+    parts = [
+        f"{name} 失败" if "error" in step else f"{name} {step['seconds'] * 1000:.0f}ms"
+        for name, step in _report["steps"].items()
+    ]
+    print(
+        f"[startup] 预热完成 {_report['warmup_seconds'] * 1000:.0f}ms："
+        + "，".join(parts),
+        file=sys.stderr,
+    )
+
+
+def startup_stats() -> Dict[str, Any]:
+    return _report
@@ -1,39 +1,550 @@
-from typing import Dict, Any, Optional, Tuple
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
 import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
 
 
+DEFAULT_TTL = 3600  # 1 小时
+JOB_TTL = 7 * 24 * 3600  # JD 预处理结果保留 7 天
+PENDING_TTL = 600  # 后台任务状态保留 10 分钟
+INGEST_TTL = 24 * 3600  # 批量导入任务进度保留 1 天
+SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
 
-_resume_cache: Dict[str, Dict[str, Any]] = {}
-_match_cache: Dict[str, Dict[str, Any]] = {}
+_MB = 1024 * 1024
+
+T = TypeVar("T")
+
+
+def _approx_size(obj: Any) -> int:
+    """粗略估算对象占用的字节数，只用于缓存容量控制。"""
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            _approx_size(k) + _approx_size(v) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_approx_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """带 TTL、条目上限和字节预算的 LRU 缓存，线程安全。"""
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (data, expires_at, size)；OrderedDict 的顺序即 LRU 顺序
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, data: Any, ttl: int = DEFAULT_TTL) -> None:
+        size = _approx_size(key) + _approx_size(data)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                # 单条就超过预算，不缓存
+                return
+            self._entries[key] = (data, time.time() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def keys(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [k for k, (_, exp, _) in self._entries.items() if exp > now]
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, exp, _) in self._entries.items() if exp <= now]
+            for k in expired:
+                self._remove(k)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+# ---------- 可插拔缓存后端 ----------
+
+# 每个 namespace 的容量限制：(最大条目数, 最大字节数)
+_LIMITS: Dict[str, Tuple[int, int]] = {
+    "resume": (
+        int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "10000")),
+        int(os.getenv("RESUME_CACHE_MAX_MB", "256")) * _MB,
+    ),
+    "match": (
+        int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "50000")),
+        int(os.getenv("MATCH_CACHE_MAX_MB", "128")) * _MB,
+    ),
+    # 规范化 JD 的预处理结果
+    "job": (
+        int(os.getenv("JOB_CACHE_MAX_ENTRIES", "10000")),
+        int(os.getenv("JOB_CACHE_MAX_MB", "64")) * _MB,
+    ),
+    # 后台提取关键信息的简历状态（pending / failed）
+    "pending": (
+        int(os.getenv("PENDING_MAX_ENTRIES", "10000")),
+        int(os.getenv("PENDING_MAX_MB", "128")) * _MB,
+    ),
+    # 批量导入任务进度
+    "ingest": (1000, 64 * _MB),
+    # 上传文件字节哈希 -> resume_id
+    "upload": (
+        int(os.getenv("UPLOAD_INDEX_MAX_ENTRIES", "50000")),
+        int(os.getenv("UPLOAD_INDEX_MAX_MB", "16")) * _MB,
+    ),
+    # PDF 单页内容指纹 -> 抽取出的文本；只在共享后端上启用
+    "page": (
+        int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "100000")),
+        int(os.getenv("PAGE_CACHE_MAX_MB", "256")) * _MB,
+    ),
+}
+_DEFAULT_LIMIT = (10000, 64 * _MB)
+
+
+class CacheBackend:
+    """缓存后端接口：按 namespace 隔离的 key -> JSON 可序列化值。"""
+
+    # 是否跨进程共享：PDF 进程池的 worker 只在共享后端上读写页缓存
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, data: Any, ttl: int = DEFAULT_TTL) -> None:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        """列出 namespace 下所有未过期的 key。"""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """清理过期条目并执行容量淘汰，返回删除的条目数。"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """进程内 LRU 缓存，多 worker 之间不共享。"""
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, namespace: str) -> LRUCache:
+        c = self._caches.get(namespace)
+        if c is None:
+            with self._lock:
+                c = self._caches.get(namespace)
+                if c is None:
+                    max_entries, max_bytes = _LIMITS.get(namespace, _DEFAULT_LIMIT)
+                    c = LRUCache(namespace, max_entries, max_bytes)
+                    self._caches[namespace] = c
+        return c
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self._cache(namespace).get(key)
+
+    def set(self, namespace: str, key: str, data: Any, ttl: int = DEFAULT_TTL) -> None:
+        self._cache(namespace).set(key, data, ttl)
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._cache(namespace).pop(key)
+
+    def keys(self, namespace: str) -> List[str]:
+        return self._cache(namespace).keys()
+
+    def sweep(self) -> int:
+        return sum(c.sweep() for c in list(self._caches.values()))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: c.stats() for name, c in list(self._caches.items())}
+
+
+class SQLiteBackend(CacheBackend):
+    """基于 SQLite（WAL 模式）的本地持久化缓存，同机多个 worker 共享，重启不丢。
+
+    淘汰按 accessed_at 近似 LRU：命中时最多每 TOUCH_INTERVAL 秒更新一次访问时间，
+    避免每次读都变成写。
+    """
+
+    TOUCH_INTERVAL = 60
+    shared = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._inherited: List[threading.local] = []
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._counter_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_accessed"
+            " ON cache_entries (namespace, accessed_at)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _after_fork(self) -> None:
+        # fork 出的子进程（如预加载应用后 fork 的服务 worker）里，父进程的 SQLite 连接
+        # 既不能用也不能关，留着引用不让它被回收，子进程另开新连接
+        self._inherited.append(self._local)
+        self._local = threading.local()
+
+    def _count(self, namespace: str, field: str, n: int = 1) -> None:
+        with self._counter_lock:
+            c = self._counters.setdefault(
+                namespace, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+            )
+            c[field] += n
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries"
+            " WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        now = time.time()
+        if row is None:
+            self._count(namespace, "misses")
+            return None
+        value, expires_at, accessed_at = row
+        if expires_at <= now:
+            self.delete(namespace, key)
+            self._count(namespace, "expirations")
+            self._count(namespace, "misses")
+            return None
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        self._count(namespace, "hits")
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, data: Any, ttl: int = DEFAULT_TTL) -> None:
+        value = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries"
+            " (namespace, key, value, size, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, key, value, len(value), now + ttl, now),
+        )
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def keys(self, namespace: str) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT key FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+            (namespace, time.time()),
+        )
+        return [r[0] for r in rows]
+
+    def sweep(self) -> int:
+        conn = self._conn()
+        now = time.time()
+        expired = conn.execute(
+            "SELECT namespace, COUNT(*) FROM cache_entries"
+            " WHERE expires_at <= ? GROUP BY namespace",
+            (now,),
+        ).fetchall()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        removed = 0
+        for ns, n in expired:
+            self._count(ns, "expirations", n)
+            removed += n
+        namespaces = [r[0] for r in conn.execute("SELECT DISTINCT namespace FROM cache_entries")]
+        for ns in namespaces:
+            max_entries, max_bytes = _LIMITS.get(ns, _DEFAULT_LIMIT)
+            # 按最近访问倒序累计，超出条目数或字节预算的部分淘汰
+            cur = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM ("
+                "  SELECT key,"
+                "   ROW_NUMBER() OVER (ORDER BY accessed_at DESC) AS rn,"
+                "   SUM(size) OVER (ORDER BY accessed_at DESC"
+                "    ROWS UNBOUNDED PRECEDING) AS running"
+                "  FROM cache_entries WHERE namespace = ?)"
+                " WHERE rn > ? OR running > ?)",
+                (ns, ns, max_entries, max_bytes),
+            )
+            if cur.rowcount:
+                self._count(ns, "evictions", cur.rowcount)
+                removed += cur.rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0)"
+            " FROM cache_entries GROUP BY namespace"
+        ).fetchall()
+        result: Dict[str, Dict[str, Any]] = {}
+        for ns, entries, size in rows:
+            max_entries, max_bytes = _LIMITS.get(ns, _DEFAULT_LIMIT)
+            result[ns] = {
+                "entries": entries,
+                "bytes": size,
+                "max_entries": max_entries,
+                "max_bytes": max_bytes,
+            }
+        with self._counter_lock:
+            for ns, counters in self._counters.items():
+                result.setdefault(ns, {}).update(counters)
+        return result
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
-DEFAULT_TTL = 3600  # 1 小时
 
+_BACKENDS = {
+    "memory": lambda: MemoryBackend(),
+    "sqlite": lambda: SQLiteBackend(os.getenv("CACHE_PATH", "resume_cache.sqlite3")),
+}
 
-def _is_expired(entry: Dict[str, Any]) -> bool:
-    ttl = entry.get("ttl", DEFAULT_TTL)
-    ts = entry.get("ts", 0)
-    return (time.time() - ts) > ttl
+_backend: CacheBackend = _BACKENDS[os.getenv("CACHE_BACKEND", "sqlite")]()
+
+
+def get_backend() -> CacheBackend:
+    return _backend
+
+
+def set_backend(backend: CacheBackend) -> None:
+    global _backend
+    _backend.close()
+    _backend = backend
 
 
 def cache_resume(resume_id: str, data: Dict[str, Any], ttl: int = DEFAULT_TTL) -> None:
-    _resume_cache[resume_id] = {"data": data, "ts": time.time(), "ttl": ttl}
+    _backend.set("resume", resume_id, data, ttl)
 
 
 def get_cached_resume(resume_id: str) -> Optional[Dict[str, Any]]:
-    entry = _resume_cache.get(resume_id)
-    if not entry or _is_expired(entry):
-        _resume_cache.pop(resume_id, None)
-        return None
-    return entry["data"]
+    return _backend.get("resume", resume_id)
+
+
+def set_resume_status(
+    resume_id: str, data: Dict[str, Any], ttl: int = PENDING_TTL
+) -> None:
+    _backend.set("pending", resume_id, data, ttl)
+
+
+def get_resume_status(resume_id: str) -> Optional[Dict[str, Any]]:
+    return _backend.get("pending", resume_id)
+
+
+def clear_resume_status(resume_id: str) -> None:
+    _backend.delete("pending", resume_id)
+
+
+def cache_ingest_job(job_id: str, data: Dict[str, Any], ttl: int = INGEST_TTL) -> None:
+    _backend.set("ingest", job_id, data, ttl)
+
+
+def get_cached_ingest_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return _backend.get("ingest", job_id)
+
+
+def list_resume_ids() -> List[str]:
+    return _backend.keys("resume")
 
 
 def cache_match(key: str, data: Dict[str, Any], ttl: int = DEFAULT_TTL) -> None:
-    _match_cache[key] = {"data": data, "ts": time.time(), "ttl": ttl}
+    _backend.set("match", key, data, ttl)
 
 
 def get_cached_match(key: str) -> Optional[Dict[str, Any]]:
-    entry = _match_cache.get(key)
-    if not entry or _is_expired(entry):
-        _match_cache.pop(key, None)
-        return None
-    return entry["data"]
+    return _backend.get("match", key)
+
+
+def cache_job(job_id: str, data: Dict[str, Any], ttl: int = JOB_TTL) -> None:
+    _backend.set("job", job_id, data, ttl)
+
+
+def get_cached_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return _backend.get("job", job_id)
+
+
+def list_job_ids() -> List[str]:
+    return _backend.keys("job")
+
+
+def cache_page_text(page_digest: str, text: str, ttl: int = DEFAULT_TTL) -> None:
+    _backend.set("page", page_digest, {"text": text}, ttl)
+
+
+def get_cached_page_text(page_digest: str) -> Optional[str]:
+    data = _backend.get("page", page_digest)
+    return data["text"] if data else None
+
+
+def index_upload(file_digest: str, resume_id: str, ttl: int = DEFAULT_TTL) -> None:
+    _backend.set("upload", file_digest, resume_id, ttl)
+
+
+def get_indexed_upload(file_digest: str) -> Optional[str]:
+    return _backend.get("upload", file_digest)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return _backend.stats()
+
+
+def sweep_expired() -> int:
+    return _backend.sweep()
+
+
+# ---------- 并发请求合并 ----------
+
+class SingleFlight:
+    """同一 key 的并发计算只执行一次，其余调用者等待同一个结果。
+
+    计算放在独立 task 里跑，发起者断开连接不会连累其他等待者。
+    只在当前进程内合并。
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def get(self, key: str) -> "Optional[asyncio.Task[Any]]":
+        return self._inflight.get(key)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+# ---------- 后台过期清理 ----------
+
+_sweeper: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+_sweep_hooks: List[Callable[[], Any]] = []
+
+
+def add_sweep_hook(fn: Callable[[], Any]) -> None:
+    """其他存储（如 LLM 回复缓存）的定期清理，跟着缓存清理线程一起跑。"""
+    if fn not in _sweep_hooks:
+        _sweep_hooks.append(fn)
+
+
+def _sweep_loop(interval: float) -> None:
+    while not _sweeper_stop.wait(interval):
+        sweep_expired()
+        for fn in list(_sweep_hooks):
+            try:
+                fn()
+            except Exception as e:
+                # 单个清理出错不能让清理线程退出
+                print(f"[cache] 清理任务 {fn.__name__} 失败：{e!r}", file=sys.stderr)
+
+
+def start_sweeper(interval: float = SWEEP_INTERVAL) -> None:
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    _sweeper_stop.clear()
+    _sweeper = threading.Thread(
+        target=_sweep_loop, args=(interval,), name="cache-sweeper", daemon=True
+    )
+    _sweeper.start()
+
+
+def stop_sweeper() -> None:
+    global _sweeper
+    _sweeper_stop.set()
+    if _sweeper is not None:
+        _sweeper.join(timeout=1)
+        _sweeper = None
@@ -0,0 +1,143 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List, Set, Tuple
+
+from cache import LRUCache
+from models import JobProfile
+from search import tokenize
+
+MATCH_PROMPT_MAX_TOKENS = int(os.getenv("MATCH_PROMPT_MAX_TOKENS", "1500"))
+
+_CJK_RE = re.compile(r"[\u4e00-\u9fa5]")
+_SECTION_RE = re.compile(
+    r"^(专业技能|技能|技术栈|工作经历|工作经验|项目经历|项目经验|"
+    r"(skills?|technical skills|experience|work experience|projects?)\b)",
+    re.I,
+)
+_OTHER_SECTION_RE = re.compile(
+    r"^(教育经历|教育背景|自我评价|个人评价|兴趣爱好|基本信息|"
+    r"(education|summary|about me|interests|hobbies)\b)",
+    re.I,
+)
+SECTION_BONUS = 2.0
+
+_MB = 1024 * 1024
+
+# resume_id -> [(行文本, token 数, 词项集合)]，每份简历只切分一次
+_segments = LRUCache("digest_segments", max_entries=2048, max_bytes=128 * _MB)
+# (resume_id, job_id, budget) -> 摘要
+_digests = LRUCache("digest", max_entries=8192, max_bytes=128 * _MB)
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "compacted": 0, "tokens_full": 0, "tokens_sent": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余约 4 字符 1 token。"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split(resume_id: str, cleaned_text: str) -> List[Tuple[str, int, Set[str]]]:
+    segments = _segments.get(resume_id)
+    if segments is None:
+        segments = [
+            (line, estimate_tokens(line) + 1, set(tokenize(line)))
+            for line in cleaned_text.splitlines()
+        ]
+        _segments.set(resume_id, segments)
+    return segments
+
+
+def _key_info_header(key_info: Dict[str, Any]) -> str:
+    labels = [
+        ("name", "姓名"),
+        ("job_intention", "求职意向"),
+        ("years_of_experience", "工作年限"),
+        ("education_background", "学历"),
+    ]
+    parts = [
+        f"{label}：{key_info[k]}" for k, label in labels if key_info.get(k) is not None
+    ]
+    return "；".join(parts)
+
+
+def build_resume_digest(
+    resume_id: str,
+    resume: Dict[str, Any],
+    job: JobProfile,
+    max_tokens: int = MATCH_PROMPT_MAX_TOKENS,
+) -> str:
+    """在 token 预算内挑出与 JD 最相关的简历内容，供 LLM 匹配打分使用。
+
+    简历本身不超预算时原样返回；否则以 ResumeKeyInfo 摘要开头，按与 JD 词项的命中数
+    （技能/经历段落标题加权）贪心选行，最后按原文顺序拼接。
+    """
+    cleaned_text = resume["parsed"]["cleaned_text"]
+    full_tokens = estimate_tokens(cleaned_text)
+
+    digest_key = f"{resume_id}:{job.job_id}:{max_tokens}"
+    digest = _digests.get(digest_key)
+    if digest is None:
+        if full_tokens <= max_tokens:
+            digest = cleaned_text
+        else:
+            digest = _compact(resume_id, resume, job, max_tokens)
+        _digests.set(digest_key, digest)
+
+    sent_tokens = estimate_tokens(digest)
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_full"] += full_tokens
+        _stats["tokens_sent"] += sent_tokens
+        if len(digest) < len(cleaned_text):
+            _stats["compacted"] += 1
+    return digest
+
+
+def _compact(
+    resume_id: str, resume: Dict[str, Any], job: JobProfile, max_tokens: int
+) -> str:
+    header = _key_info_header(resume["key_info"])
+    budget = max_tokens - estimate_tokens(header)
+    jd_terms = job.term_counts
+
+    segments = _split(resume_id, resume["parsed"]["cleaned_text"])
+    scored = []
+    in_section = False
+    for i, (line, tokens, terms) in enumerate(segments):
+        is_heading = bool(_SECTION_RE.match(line))
+        if is_heading:
+            in_section = True
+        elif _OTHER_SECTION_RE.match(line):
+            in_section = False
+        score = sum(jd_terms.get(t, 0) for t in terms)
+        if in_section:
+            # 技能/经历段落内的行优先保留，段落标题本身加权更高
+            score += SECTION_BONUS if is_heading else 0.5
+        if score > 0:
+            scored.append((score, i, tokens))
+
+    chosen = []
+    for score, i, tokens in sorted(scored, key=lambda x: (-x[0], x[1])):
+        if tokens > budget:
+            continue
+        chosen.append(i)
+        budget -= tokens
+    chosen.sort()
+
+    lines = [header] if header else []
+    lines.extend(segments[i][0] for i in chosen)
+    return "\n".join(lines)
+
+
+def compaction_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    saved = stats["tokens_full"] - stats["tokens_sent"]
+    stats["tokens_saved"] = saved
+    calls = stats["calls"]
+    stats["avg_tokens_saved_per_call"] = round(saved / calls, 1) if calls else 0.0
+    stats["max_tokens"] = MATCH_PROMPT_MAX_TOKENS
+    return stats
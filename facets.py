@@ -0,0 +1,129 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from scoring import parse_degree_level
+from search import tokenize
+
+
+class FacetIndex:
+    """ResumeKeyInfo 字段的二级索引：年限用有序数组做区间查询，
+    学历、求职意向、地址用倒排表做精确/词项过滤。"""
+
+    def __init__(self) -> None:
+        self._years: List[Tuple[float, str]] = []  # 按年限排序的 (years, resume_id)
+        self._degree: Dict[int, Set[str]] = {}
+        self._intention: Dict[str, Set[str]] = {}
+        self._address: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}  # resume_id -> 摘要
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, resume_id: str) -> bool:
+        with self._lock:
+            return resume_id in self._docs
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._docs)
+
+    def add(self, resume_id: str, key_info: Dict[str, Any]) -> None:
+        doc = {
+            "resume_id": resume_id,
+            "name": key_info.get("name"),
+            "years_of_experience": key_info.get("years_of_experience"),
+            "education_background": key_info.get("education_background"),
+            "job_intention": key_info.get("job_intention"),
+            "address": key_info.get("address"),
+        }
+        doc["degree_level"] = parse_degree_level(doc["education_background"])
+        with self._lock:
+            if resume_id in self._docs:
+                self._remove(resume_id)
+            self._docs[resume_id] = doc
+            if doc["years_of_experience"] is not None:
+                bisect.insort(self._years, (doc["years_of_experience"], resume_id))
+            if doc["degree_level"] is not None:
+                self._degree.setdefault(doc["degree_level"], set()).add(resume_id)
+            for term in set(tokenize(doc["job_intention"] or "")):
+                self._intention.setdefault(term, set()).add(resume_id)
+            for term in set(tokenize(doc["address"] or "")):
+                self._address.setdefault(term, set()).add(resume_id)
+
+    def add_record(self, resume_id: str, data: Dict[str, Any]) -> None:
+        self.add(resume_id, data["resume"]["key_info"])
+
+    def remove(self, resume_id: str) -> None:
+        with self._lock:
+            if resume_id in self._docs:
+                self._remove(resume_id)
+
+    def _remove(self, resume_id: str) -> None:
+        doc = self._docs.pop(resume_id)
+        if doc["years_of_experience"] is not None:
+            i = bisect.bisect_left(self._years, (doc["years_of_experience"], resume_id))
+            if i < len(self._years) and self._years[i][1] == resume_id:
+                del self._years[i]
+        if doc["degree_level"] is not None:
+            self._degree.get(doc["degree_level"], set()).discard(resume_id)
+        for postings, field in (
+            (self._intention, "job_intention"),
+            (self._address, "address"),
+        ):
+            for term in set(tokenize(doc[field] or "")):
+                ids = postings.get(term)
+                if ids is not None:
+                    ids.discard(resume_id)
+                    if not ids:
+                        del postings[term]
+
+    def query(
+        self,
+        min_years: Optional[float] = None,
+        max_years: Optional[float] = None,
+        min_degree: Optional[int] = None,
+        job_intention: Optional[str] = None,
+        address: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """各条件取交集，返回 (命中总数, 按年限倒序的前 limit 条摘要)。"""
+        with self._lock:
+            candidates: List[Set[str]] = []
+            if min_years is not None or max_years is not None:
+                lo, hi = 0, len(self._years)
+                if min_years is not None:
+                    lo = bisect.bisect_left(self._years, (min_years, ""))
+                if max_years is not None:
+                    hi = bisect.bisect_right(self._years, (max_years, "\uffff"))
+                candidates.append({rid for _, rid in self._years[lo:hi]})
+            if min_degree is not None:
+                ids: Set[str] = set()
+                for level, members in self._degree.items():
+                    if level >= min_degree:
+                        ids |= members
+                candidates.append(ids)
+            for postings, text in (
+                (self._intention, job_intention),
+                (self._address, address),
+            ):
+                for term in set(tokenize(text or "")):
+                    candidates.append(postings.get(term, set()))
+
+            if candidates:
+                candidates.sort(key=len)
+                hits = set(candidates[0])
+                for ids in candidates[1:]:
+                    hits &= ids
+                    if not hits:
+                        break
+            else:
+                hits = set(self._docs)
+            docs = [self._docs[rid] for rid in hits]
+
+        docs.sort(key=lambda d: d["years_of_experience"] or 0.0, reverse=True)
+        return len(docs), docs[:limit]
+
+
+facet_index = FacetIndex()
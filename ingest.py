@@ -0,0 +1,212 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from cache import cache_ingest_job, get_cached_ingest_job
+from pipeline import IngestError, ingest_resume_bytes
+
+INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "20000"))
+INGEST_MAX_FILE_MB = int(os.getenv("INGEST_MAX_FILE_MB", "10"))
+# 一次 /ingest 请求的总大小（所有 PDF 和 ZIP 合计）
+INGEST_MAX_TOTAL_MB = int(os.getenv("INGEST_MAX_TOTAL_MB", "1024"))
+# 同时处理的文件数：解析受进程池限制，LLM 调用受 ai_utils 的并发上限限制
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "16"))
+MAX_REPORTED_ERRORS = 1000
+STATUS_FLUSH_INTERVAL = 1.0  # 进度写回共享缓存的最小间隔（秒）
+
+_jobs: Dict[str, "IngestJob"] = {}
+_tasks: Set["asyncio.Task[None]"] = set()
+
+
+class IngestJob:
+    def __init__(
+        self, job_id: str, workdir: str, sources: List[Tuple[str, str]]
+    ) -> None:
+        self.job_id = job_id
+        self.workdir = workdir
+        self.sources = sources  # [(原始文件名, 落盘路径)]
+        self.status = "running"
+        self.total = 0
+        self.succeeded = 0
+        self.cached = 0
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._last_flush = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "cached": self.cached,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "docs_per_sec": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def record_error(self, filename: str, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"filename": filename, "error": error})
+
+    def flush(self, force: bool = False) -> None:
+        now = time.time()
+        if force or now - self._last_flush >= STATUS_FLUSH_INTERVAL:
+            self._last_flush = now
+            cache_ingest_job(self.job_id, self.to_dict())
+
+
+def _iter_documents(
+    job: IngestJob,
+) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """逐个产出 (文件名, PDF 字节, 错误)；ZIP 按成员展开，只在需要时读入内存。"""
+    max_bytes = INGEST_MAX_FILE_MB * 1024 * 1024
+    for filename, path in job.sources:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith("__MACOSX/"):
+                        continue
+                    if not name.lower().endswith(".pdf"):
+                        continue
+                    label = f"{filename}/{name}"
+                    if info.file_size > max_bytes:
+                        yield label, None, f"文件超过 {INGEST_MAX_FILE_MB}MB"
+                        continue
+                    # 单个成员损坏（CRC 错误、加密、不支持的压缩方式）只算这一份失败
+                    try:
+                        data = zf.read(info)
+                    except (
+                        zipfile.BadZipFile,
+                        RuntimeError,
+                        NotImplementedError,
+                        zlib.error,
+                        OSError,
+                    ) as e:
+                        yield label, None, f"解压失败：{e}"
+                        continue
+                    yield label, data, None
+        else:
+            if os.path.getsize(path) > max_bytes:
+                yield filename, None, f"文件超过 {INGEST_MAX_FILE_MB}MB"
+                continue
+            with open(path, "rb") as f:
+                yield filename, f.read(), None
+
+
+def _count_documents(sources: List[Tuple[str, str]]) -> int:
+    total = 0
+    for _, path in sources:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                total += sum(
+                    1
+                    for info in zf.infolist()
+                    if not info.is_dir()
+                    and not info.filename.startswith("__MACOSX/")
+                    and info.filename.lower().endswith(".pdf")
+                )
+        else:
+            total += 1
+    return total
+
+
+async def _run(job: IngestJob) -> None:
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def _one(filename: str, file_bytes: bytes) -> None:
+        try:
+            _, hit = await ingest_resume_bytes(file_bytes)
+            job.succeeded += 1
+            job.cached += int(hit)
+        except IngestError as e:
+            job.record_error(filename, e.detail)
+        except Exception as e:
+            job.record_error(filename, str(e) or type(e).__name__)
+        finally:
+            semaphore.release()
+            job.flush()
+
+    pending: Set["asyncio.Task[None]"] = set()
+    documents = _iter_documents(job)
+    try:
+        while True:
+            # 先拿名额再读下一个文件，内存里最多只有 INGEST_CONCURRENCY 份 PDF
+            await semaphore.acquire()
+            # 识别 ZIP、解压成员、读文件都是阻塞 IO，放到线程里做，不卡住事件循环
+            item = await asyncio.to_thread(next, documents, None)
+            if item is None:
+                semaphore.release()
+                break
+            filename, file_bytes, error = item
+            if error is not None:
+                semaphore.release()
+                job.record_error(filename, error)
+                continue
+            task = asyncio.ensure_future(_one(filename, file_bytes))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        job.status = "done"
+    except Exception as e:
+        job.status = "failed"
+        job.record_error("", f"导入任务异常终止：{e}")
+    finally:
+        # 异常终止时取消还在跑的文件并等它们退出，免得删掉 workdir 后还在回写进度
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        job.finished_at = time.time()
+        job.flush(force=True)
+        # 结束后的状态只保留在共享缓存里
+        _jobs.pop(job.job_id, None)
+        shutil.rmtree(job.workdir, ignore_errors=True)
+
+
+async def start_job(sources: List[Tuple[str, str]], workdir: str) -> IngestJob:
+    """sources 为已落盘的上传文件 [(文件名, 路径)]，任务结束后删除 workdir。"""
+    total = await asyncio.to_thread(_count_documents, sources)
+    if total > INGEST_MAX_FILES:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise IngestError(f"一次最多导入 {INGEST_MAX_FILES} 份简历", status_code=413)
+
+    job = IngestJob(uuid.uuid4().hex[:16], workdir, sources)
+    job.total = total
+    _jobs[job.job_id] = job
+    job.flush(force=True)
+
+    task = asyncio.ensure_future(_run(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+def new_workdir() -> str:
+    return tempfile.mkdtemp(prefix="resume-ingest-")
+
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    # 其他 worker 上的任务
+    return get_cached_ingest_job(job_id)
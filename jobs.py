@@ -0,0 +1,76 @@
+import re
+from typing import Optional
+
+from ai_utils import compute_job_digest, extract_keywords
+from cache import LRUCache, cache_job, get_cached_job
+from jobsim import job_index, minhash_signature, profile_signature
+from models import JobProfile
+from scoring import MAX_JD_TERMS, parse_required_degree, parse_required_years
+from search import term_counts
+
+_SPACE_RE = re.compile(r"[ \t　]+")
+_SKILL_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#.]*[A-Za-z0-9+#]")
+# JD 中常见但不是技能的英文词
+_SKILL_STOPWORDS = {
+    "and", "or", "the", "of", "in", "on", "for", "to", "with", "a", "an", "is", "are",
+    "be", "we", "you", "our", "your", "will", "as", "at", "by", "from", "plus",
+    "years", "year", "experience", "degree", "bachelor", "master", "phd",
+    "engineer", "developer", "senior", "junior", "team", "work", "strong", "good",
+    "knowledge", "skills", "ability", "familiar", "required", "preferred",
+}
+
+# 进程内热点 JD，命中时连反序列化都省掉
+_local_profiles = LRUCache("job_local", max_entries=1024, max_bytes=64 * 1024 * 1024)
+
+
+def normalize_job_text(text: str) -> str:
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _build_profile(job_id: str, text: str) -> JobProfile:
+    counts = term_counts(text)
+    top = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:MAX_JD_TERMS]
+    skills = []
+    for m in _SKILL_RE.finditer(text):
+        skill = m.group(0).lower()
+        if len(skill) > 1 and skill not in _SKILL_STOPWORDS and skill not in skills:
+            skills.append(skill)
+    return JobProfile(
+        job_id=job_id,
+        text=text,
+        keywords=extract_keywords(text, top_k=10),
+        skills=skills[:30],
+        min_years=parse_required_years(text),
+        min_degree=parse_required_degree(text),
+        term_counts=dict(top),
+        minhash=minhash_signature(text),
+    )
+
+
+def register_job(job_text: str) -> JobProfile:
+    """返回 JD 的预处理结果；同一份（规范化后相同的）JD 只分析一次。"""
+    text = normalize_job_text(job_text)
+    job_id = compute_job_digest(text.lower())
+    profile = get_job_profile(job_id)
+    if profile is None:
+        profile = _build_profile(job_id, text)
+        cache_job(job_id, profile.dict())
+        _local_profiles.set(job_id, profile)
+        job_index.add(job_id, profile.minhash)
+    return profile
+
+
+def get_job_profile(job_id: str) -> Optional[JobProfile]:
+    profile = _local_profiles.get(job_id)
+    if profile is not None:
+        return profile
+    data = get_cached_job(job_id)
+    if not data:
+        return None
+    if not data.get("minhash"):
+        data = {**data, "minhash": profile_signature(data)}
+    profile = JobProfile(**data)
+    _local_profiles.set(job_id, profile)
+    job_index.add(job_id, profile.minhash)
+    return profile
@@ -11,6 +11,8 @@ const matchStatus = document.getElementById("match-status");
 const matchResult = document.getElementById("match-result");
 
 let currentResumeId = null;
+// 当前简历的 SSE 连接，上传新文件时关掉旧的
+let resumeEvents = null;
 
 uploadForm.addEventListener("submit", async (e) => {
   e.preventDefault();
@@ -20,6 +22,10 @@ uploadForm.addEventListener("submit", async (e) => {
     return;
   }
 
+  // 旧简历的 SSE 和轮询都停掉，免得它提取完成后把 currentResumeId 改回去
+  closeResumeEvents();
+  currentResumeId = null;
+  matchButton.disabled = true;
   uploadStatus.textContent = "上传中...";
   resumeInfo.textContent = "";
 
@@ -27,7 +33,8 @@ uploadForm.addEventListener("submit", async (e) => {
   formData.append("file", file);
 
   try {
-    const resp = await fetch(`${API_BASE_URL}/upload-resume`, {
+    // 解析完成即返回，关键信息在后台提取
+    const resp = await fetch(`${API_BASE_URL}/upload-resume?background=true`, {
       method: "POST",
       body: formData,
     });
@@ -38,16 +45,102 @@ uploadForm.addEventListener("submit", async (e) => {
     }
 
     const data = await resp.json();
-    currentResumeId = data.resume.resume_id;
-    uploadStatus.textContent = `解析完成，resume_id = ${currentResumeId}`;
-    resumeInfo.textContent = JSON.stringify(data.resume, null, 2);
+    currentResumeId = data.resume_id;
+    if (applyResumeStatus(data)) {
+      // 已缓存的简历直接返回完整结果
+      return;
+    }
+
+    uploadStatus.textContent = `解析完成，正在提取关键信息... resume_id = ${currentResumeId}`;
+    resumeInfo.textContent = data.parsed.cleaned_text;
     matchButton.disabled = false;
+    watchResumeStatus(currentResumeId);
   } catch (err) {
     console.error(err);
     uploadStatus.textContent = "上传或解析失败：" + err.message;
   }
 });
 
+function showResume(resume) {
+  currentResumeId = resume.resume_id;
+  uploadStatus.textContent = `解析完成，resume_id = ${currentResumeId}`;
+  resumeInfo.textContent = JSON.stringify(resume, null, 2);
+  matchButton.disabled = false;
+}
+
+// 处理一次 ResumeStatus，返回是否已到终态；不是当前简历的状态直接当作结束
+function applyResumeStatus(status) {
+  if (status.resume_id !== currentResumeId) {
+    return true;
+  }
+  if (status.status === "ready") {
+    showResume(status.resume);
+    return true;
+  }
+  if (status.status === "failed") {
+    uploadStatus.textContent = "关键信息提取失败：" + status.error;
+    return true;
+  }
+  return false;
+}
+
+function closeResumeEvents() {
+  if (resumeEvents) {
+    resumeEvents.close();
+    resumeEvents = null;
+  }
+}
+
+function watchResumeStatus(resumeId) {
+  closeResumeEvents();
+  const source = new EventSource(`${API_BASE_URL}/resume/${resumeId}/events`);
+  resumeEvents = source;
+  source.addEventListener("status", (e) => {
+    if (applyResumeStatus(JSON.parse(e.data))) {
+      source.close();
+    }
+  });
+  // 服务端等待超时，简历仍在提取中：改为轮询
+  source.addEventListener("timeout", () => {
+    source.close();
+    pollResumeStatus(resumeId);
+  });
+  source.addEventListener("error", (e) => {
+    source.close();
+    if (resumeId !== currentResumeId) {
+      return;
+    }
+    if (e.data) {
+      // 服务端发送的 error 事件（如简历不存在）
+      uploadStatus.textContent = "关键信息提取失败：" + JSON.parse(e.data).detail;
+    } else {
+      // 连接断开
+      pollResumeStatus(resumeId);
+    }
+  });
+}
+
+async function pollResumeStatus(resumeId) {
+  // 换了简历就停止轮询旧的
+  while (currentResumeId === resumeId) {
+    await new Promise((resolve) => setTimeout(resolve, 3000));
+    try {
+      const resp = await fetch(`${API_BASE_URL}/resume/${resumeId}`);
+      if (!resp.ok) {
+        const err = await resp.json().catch(() => ({}));
+        uploadStatus.textContent = "关键信息提取失败：" + (err.detail || resp.status);
+        return;
+      }
+      if (applyResumeStatus(await resp.json())) {
+        return;
+      }
+    } catch (err) {
+      // 网络抖动，下一轮再试
+      console.error(err);
+    }
+  }
+}
+
 matchButton.addEventListener("click", async () => {
   if (!currentResumeId) {
     alert("请先上传并解析简历");
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 
 
 class ResumeParsed(BaseModel):
@@ -24,20 +24,162 @@ class ResumeFullInfo(BaseModel):
     key_info: ResumeKeyInfo
 
 
+MATCH_MODE_DESC = "llm：调用 LLM 打分；local：本地打分；auto：LLM 超时或失败时退回本地"
+
+
 class JobRequest(BaseModel):
     resume_id: str
+    job_description: Optional[str] = None
+    job_id: Optional[str] = Field(None, description="已通过 /jobs 注册的 JD，可代替 job_description")
+    mode: Literal["llm", "local", "auto"] = Field("llm", description=MATCH_MODE_DESC)
+    view: Literal["full", "compact"] = Field(
+        "full", description="compact：只返回 resume_id、job_id、match_score"
+    )
+    fields: Optional[List[str]] = Field(
+        None,
+        description="只返回列出的字段，优先于 view；可选 resume_id, job_id, resume, "
+        "job_description, match_score, cached",
+    )
+    allow_approximate: bool = Field(
+        True, description="允许复用同一简历对近似重复 JD 的已有打分"
+    )
+
+
+class ResumeStatus(BaseModel):
+    resume_id: str
+    status: Literal["pending", "ready", "failed"]
+    parsed: Optional[ResumeParsed] = None
+    resume: Optional[ResumeFullInfo] = None
+    error: Optional[str] = None
+
+
+class JobRegisterRequest(BaseModel):
     job_description: str
 
 
+class JobProfile(BaseModel):
+    job_id: str = Field(..., description="规范化 JD 文本的内容指纹")
+    text: str = Field(..., description="规范化后的 JD 文本")
+    keywords: List[str]
+    skills: List[str] = Field([], description="JD 中出现的英文技能词")
+    min_years: Optional[float] = None
+    min_degree: Optional[int] = Field(
+        None, description="最低学历等级：1 大专 2 本科 3 硕士 4 博士"
+    )
+    term_counts: Dict[str, int] = {}
+    minhash: List[int] = Field([], description="规范化文本的 MinHash 签名，用于查找近似重复 JD")
+
+
 class MatchScore(BaseModel):
     overall_score: float
     skill_match_score: float
     experience_match_score: float
     education_match_score: float
     keywords: List[str]
+    scorer: str = Field("llm", description="打分来源：llm 或 local")
+    approximate: bool = Field(False, description="是否复用了相似 JD 的打分")
+    source_job_id: Optional[str] = Field(None, description="approximate 时被复用的 JD")
+    similarity: Optional[float] = Field(None, description="approximate 时与该 JD 的相似度")
 
 
 class MatchResponse(BaseModel):
     resume: ResumeFullInfo
     job_description: str
     match_score: MatchScore
+
+
+class CompactMatchResponse(BaseModel):
+    resume_id: str
+    job_id: str
+    match_score: MatchScore
+
+
+MATCH_RESPONSE_FIELDS = (
+    "resume_id", "job_id", "resume", "job_description", "match_score", "cached"
+)
+MATCH_VIEWS = {
+    "full": ("resume", "job_description", "match_score"),
+    "compact": ("resume_id", "job_id", "match_score"),
+}
+
+
+class BatchJobRequest(BaseModel):
+    resume_id: str
+    job_descriptions: List[str] = []
+    job_ids: List[str] = Field([], description="已注册 JD 的 job_id，与 job_descriptions 合并评估")
+    concurrency: Optional[int] = Field(None, description="同时评分的 JD 数量上限")
+    mode: Literal["llm", "local", "auto"] = Field("llm", description=MATCH_MODE_DESC)
+    allow_approximate: bool = Field(
+        True, description="允许复用同一简历对近似重复 JD 的已有打分"
+    )
+
+
+class BatchMatchItem(BaseModel):
+    index: int = Field(..., description="下标：先 job_descriptions，后接 job_ids")
+    job_id: str
+    cached: bool = False
+    match_score: Optional[MatchScore] = None
+    error: Optional[str] = None
+
+
+class RankRequest(BaseModel):
+    job_description: Optional[str] = None
+    job_id: Optional[str] = None
+    top_k: int = Field(10, description="本地粗排后交给 LLM 精排的简历数量")
+    rerank: bool = Field(True, description="为 False 时只返回本地粗排结果")
+    mode: Literal["llm", "local", "auto"] = Field("llm", description=MATCH_MODE_DESC)
+
+
+class RankedResume(BaseModel):
+    resume_id: str
+    name: Optional[str] = None
+    prefilter_score: float
+    match_score: Optional[MatchScore] = None
+    error: Optional[str] = None
+
+
+class RankResponse(BaseModel):
+    job_id: str
+    total_candidates: int
+    results: List[RankedResume]
+
+
+class FilterRequest(BaseModel):
+    min_years: Optional[float] = None
+    max_years: Optional[float] = None
+    degree: Optional[str] = Field(None, description="最低学历，如 本科 / 硕士 / Master")
+    job_intention: Optional[str] = Field(None, description="求职意向关键词，需全部命中")
+    address: Optional[str] = Field(None, description="地址关键词，需全部命中")
+    limit: int = 100
+
+
+class ResumeSummary(BaseModel):
+    resume_id: str
+    name: Optional[str] = None
+    years_of_experience: Optional[float] = None
+    education_background: Optional[str] = None
+    job_intention: Optional[str] = None
+    address: Optional[str] = None
+
+
+class FilterResponse(BaseModel):
+    total: int
+    results: List[ResumeSummary]
+
+
+class IngestFileError(BaseModel):
+    filename: str
+    error: str
+
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    status: Literal["running", "done", "failed"]
+    total: int = Field(..., description="待导入的 PDF 数（ZIP 已展开）")
+    processed: int
+    succeeded: int
+    cached: int = Field(0, description="succeeded 中命中缓存、未重新解析的数量")
+    failed: int
+    errors: List[IngestFileError] = []
+    elapsed_seconds: float
+    docs_per_sec: float
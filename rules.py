@@ -0,0 +1,189 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from scoring import parse_degree_level
+
+# 规则结果的置信度达到该值就不再交给 LLM
+KEY_INFO_MIN_CONFIDENCE = float(os.getenv("KEY_INFO_MIN_CONFIDENCE", "0.75"))
+
+# 由规则引擎 / LLM 负责的字段；extra 只在需要调用 LLM 时顺带请求
+RULE_FIELDS = (
+    "name",
+    "phone",
+    "email",
+    "address",
+    "job_intention",
+    "years_of_experience",
+    "education_background",
+)
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(1[3-9]\d{9})|(\+?\d[\d -]{8,}\d)")
+_MOBILE_RE = re.compile(r"(?<!\d)(?:\+?86[ -]?)?(1[3-9]\d[ -]?\d{4}[ -]?\d{4})(?!\d)")
+
+_LABEL_SEP = r"\s*[:：]\s*"
+_NAME_LABEL_RE = re.compile(
+    rf"^\s*(?:姓\s*名|name){_LABEL_SEP}(\S.{{0,30}}?)\s*$", re.I | re.M
+)
+_INTENTION_RE = re.compile(
+    rf"^\s*(?:求职意向|意向岗位|期望职位|应聘职位|目标职位|job intention|objective|"
+    rf"desired position){_LABEL_SEP}(\S.{{0,60}}?)\s*$",
+    re.I | re.M,
+)
+_ADDRESS_RE = re.compile(
+    rf"^\s*(?:现居地|居住地|所在地|现居住地|地址|住址|address|location){_LABEL_SEP}"
+    r"(\S.{0,60}?)\s*$",
+    re.I | re.M,
+)
+_EDU_LABEL_RE = re.compile(
+    rf"^\s*(?:学历|最高学历|education|degree){_LABEL_SEP}(\S.{{0,80}}?)\s*$",
+    re.I | re.M,
+)
+_YEARS_RES = [
+    re.compile(rf"(?:工作(?:经验|年限)|从业年限){_LABEL_SEP}(\d+(?:\.\d+)?)\s*年"),
+    re.compile(r"(\d+(?:\.\d+)?)\s*年(?:以上|多)?(?:的)?(?:工作|开发|相关|行业|项目)*经验"),
+    re.compile(
+        r"(\d+(?:\.\d+)?)\s*\+?\s*years?\s+(?:of\s+)?(?:\w+\s+){0,2}experience", re.I
+    ),
+]
+_CN_NAME_RE = re.compile(r"^[\u4e00-\u9fa5]{2,4}$")
+_EN_NAME_RE = re.compile(r"^[A-Z][a-z]+(?:[ -][A-Z][a-z]+){1,2}$")
+# 出现在简历开头但不是姓名的常见标题
+_NOT_NAMES = {"个人简历", "简历", "求职简历", "基本信息", "个人信息", "联系方式"}
+_HEADING_RE = re.compile(
+    r"简历|资料|信息|背景|经历|经验|技能|评价|项目|教育|工作|联系|求职|概况|"
+    r"curriculum|vitae|resume|information|profile|summary|experience|education|"
+    r"skills|contact|objective|personal",
+    re.I,
+)
+_CJK_DEGREE_RE = re.compile(r"博士|硕士|研究生|本科|学士|大专|专科")
+_SCHOOL_RE = re.compile(r"大学|学院|university|college|institute", re.I)
+# 含 master 但与学历无关的常见说法
+_NOT_DEGREE_RE = re.compile(
+    r"scrum\s*master|master\s+(?:data|branch|node|class)|mastered|mastering", re.I
+)
+
+NAME_SCAN_LINES = 5
+MAX_YEARS = 50
+# 这些字段通常都在简历开头的个人信息里，只缺它们时 LLM 只需要看开头几十行
+HEADER_FIELDS = {"name", "phone", "email", "address", "job_intention"}
+HEADER_LINES = 30
+
+RuleFields = Dict[str, Tuple[Any, float]]
+
+
+def _first_lines(text: str, n: int) -> List[str]:
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            lines.append(line)
+            if len(lines) >= n:
+                break
+    return lines
+
+
+def _match_name(text: str) -> Optional[Tuple[str, float]]:
+    m = _NAME_LABEL_RE.search(text)
+    if m:
+        return m.group(1), 0.95
+    # 没有“姓名：”标签时，开头的短行也可能是“教育背景”之类的标题，
+    # 置信度低于阈值，交给 LLM 确认；LLM 也没给出时才用这里的结果
+    for line in _first_lines(text, NAME_SCAN_LINES):
+        if line in _NOT_NAMES or _HEADING_RE.search(line):
+            continue
+        if _CN_NAME_RE.match(line):
+            return line, 0.6
+        if _EN_NAME_RE.match(line):
+            return line, 0.55
+    return None
+
+
+def _match_phone(text: str) -> Optional[Tuple[str, float]]:
+    m = _MOBILE_RE.search(text)
+    if m:
+        return re.sub(r"[ -]", "", m.group(1)), 0.95
+    m = PHONE_RE.search(text)
+    if m:
+        # 通用号码格式也可能是日期、学号，置信度低，交给 LLM 确认
+        return m.group(0), 0.5
+    return None
+
+
+def _match_years(text: str) -> Optional[Tuple[float, float]]:
+    for i, pattern in enumerate(_YEARS_RES):
+        for m in pattern.finditer(text):
+            years = float(m.group(1))
+            if 0 < years <= MAX_YEARS:
+                return years, 0.95 if i == 0 else 0.85
+    return None
+
+
+def _match_education(text: str) -> Optional[Tuple[str, float]]:
+    m = _EDU_LABEL_RE.search(text)
+    if m and parse_degree_level(m.group(1)):
+        return m.group(1), 0.95
+    # 没有“学历：”标签时取学历等级最高的一行，保留学校、专业等上下文；
+    # 带学校名的行优先，避免 Scrum Master 之类的误中压过真正的学历
+    best: Optional[Tuple[Tuple[bool, int], str]] = None
+    for line in text.splitlines():
+        level = parse_degree_level(_NOT_DEGREE_RE.sub("", line))
+        if not level:
+            continue
+        rank = (bool(_SCHOOL_RE.search(line)), level)
+        if best is None or rank > best[0]:
+            best = (rank, line.strip()[:80])
+    if best is None:
+        return None
+    (has_school, _), line = best
+    confident = has_school or _CJK_DEGREE_RE.search(line)
+    return line, 0.85 if confident else 0.6
+
+
+def extract_rule_fields(text: str) -> RuleFields:
+    """本地规则抽取关键信息，返回 {字段: (值, 置信度)}，未识别的字段不出现。"""
+    found: RuleFields = {}
+
+    m = EMAIL_RE.search(text)
+    if m:
+        found["email"] = (m.group(0), 0.99)
+
+    for field, matcher in (
+        ("name", _match_name),
+        ("phone", _match_phone),
+        ("years_of_experience", _match_years),
+        ("education_background", _match_education),
+    ):
+        result = matcher(text)
+        if result is not None:
+            found[field] = result
+
+    for field, pattern, confidence in (
+        ("job_intention", _INTENTION_RE, 0.9),
+        ("address", _ADDRESS_RE, 0.85),
+    ):
+        m = pattern.search(text)
+        if m:
+            found[field] = (m.group(1), confidence)
+    return found
+
+
+def split_confident(
+    found: RuleFields, min_confidence: float = KEY_INFO_MIN_CONFIDENCE
+) -> Tuple[Dict[str, Any], List[str]]:
+    """拆成 (可直接采用的字段值, 仍需 LLM 抽取的字段列表)。"""
+    confident = {
+        field: value
+        for field, (value, confidence) in found.items()
+        if confidence >= min_confidence
+    }
+    missing = [field for field in RULE_FIELDS if field not in confident]
+    return confident, missing
+
+
+def text_for_fields(text: str, fields: List[str]) -> str:
+    """只缺个人信息类字段时截取简历开头，缩小补全请求的输入。"""
+    if set(fields) <= HEADER_FIELDS:
+        return "\n".join(_first_lines(text, HEADER_LINES))
+    return text